@@ -5,11 +5,16 @@ Downloads Consumer Price Index for All Urban Consumers (CPIAUCSL).
 
 import re
 import argparse
+import logging
 from pathlib import Path
 
 import pandas as pd
 
-from utils import create_session, save_metadata, load_config
+from utils import create_session, save_metadata, load_config, write_csv, setup_logging
+from vintages import record_vintage
+
+
+logger = logging.getLogger(__name__)
 
 
 def load_api_key(api_key_file):
@@ -20,8 +25,8 @@ def load_api_key(api_key_file):
     return api_key
 
 
-def acquire_cpi(config, api_key):
-    """Download CPI data from FRED API."""
+def acquire_cpi(config, api_key, session=None):
+    """Download CPI data from FRED API (reusing session if given)."""
     
     url = "https://api.stlouisfed.org/fred/series/observations"
     params = {
@@ -32,8 +37,8 @@ def acquire_cpi(config, api_key):
         'observation_end': config['end_date'],
     }
     
-    print(f"Fetching CPI data from FRED API...")
-    session = create_session()
+    logger.info(f"Fetching CPI data from FRED API...")
+    session = session or create_session()
     response = session.get(url, params=params, timeout=60)
     response.raise_for_status()
     
@@ -51,7 +56,9 @@ def main():
     parser = argparse.ArgumentParser(description='Acquire CPI data from FRED API')
     parser.add_argument('--config', default='config.yaml', help='Path to config file')
     parser.add_argument('--output', required=True, help='Output CSV path')
+    parser.add_argument('--vintage-dir', help='Also record this download as a vintage delta in this store')
     args = parser.parse_args()
+    setup_logging()
     
     # Load configuration
     config = load_config(args.config)
@@ -65,16 +72,20 @@ def main():
     # Save CSV
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    cpi_df.to_csv(output_path, index=False)
-    print(f"CPI data saved: {output_path} ({len(cpi_df)} rows)")
+    digest = write_csv(cpi_df, output_path)
+    logger.info(f"CPI data saved: {output_path} ({len(cpi_df)} rows)",
+                extra={'stage': 'acquire_cpi', 'output': str(output_path), 'rows': len(cpi_df)})
     
     # Save metadata
     save_metadata(output_path, {
         'series_id': config['series']['cpi']['series_id'],
         'source': config['series']['cpi']['source'],
         'description': config['series']['cpi']['description'],
-        'row_count': len(cpi_df),
-    })
+    }, digest)
+    
+    # Keep revision history so older vintages can be rebuilt later
+    if args.vintage_dir:
+        record_vintage(cpi_df, args.vintage_dir, config['series']['cpi']['series_id'], 'cpi')
 
 
 if __name__ == '__main__':
@@ -5,15 +5,20 @@ Downloads Personal Consumption Expenditures (PCE).
 
 import argparse
 import io
+import logging
 from pathlib import Path
 
 import pandas as pd
 
-from utils import create_session, save_metadata, load_config
+from utils import create_session, save_metadata, load_config, write_csv, setup_logging
+from vintages import record_vintage
 
 
-def acquire_pce(config):
-    """Download PCE data from FRED website CSV."""
+logger = logging.getLogger(__name__)
+
+
+def acquire_pce(config, session=None):
+    """Download PCE data from FRED website CSV (reusing session if given)."""
     
     # Try multiple URLs (fallback approach)
     urls = [
@@ -21,23 +26,23 @@ def acquire_pce(config):
         f"https://fred.stlouisfed.org/series/{config['series']['pce']['series_id']}/downloaddata/{config['series']['pce']['series_id']}.csv",
     ]
     
-    session = create_session()
+    session = session or create_session()
     pce_df = None
     successful_url = None
     
     for url in urls:
         try:
-            print(f"Trying: {url}")
+            logger.info(f"Trying: {url}")
             response = session.get(url, timeout=60)
             response.raise_for_status()
             
             # Parse CSV
             pce_df = pd.read_csv(io.StringIO(response.text))
             successful_url = url
-            print(f"Downloaded from: {url}")
+            logger.info(f"Downloaded from: {url}")
             break
         except Exception as e:
-            print(f"Failed: {url} - {e}")
+            logger.warning(f"Failed: {url} - {e}")
             continue
     
     if pce_df is None:
@@ -66,7 +71,9 @@ def main():
     parser = argparse.ArgumentParser(description='Acquire PCE data from FRED CSV')
     parser.add_argument('--config', default='config.yaml', help='Path to config file')
     parser.add_argument('--output', required=True, help='Output CSV path')
+    parser.add_argument('--vintage-dir', help='Also record this download as a vintage delta in this store')
     args = parser.parse_args()
+    setup_logging()
     
     # Load configuration
     config = load_config(args.config)
@@ -77,16 +84,20 @@ def main():
     # Save CSV
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    pce_df.to_csv(output_path, index=False)
-    print(f"PCE data saved: {output_path} ({len(pce_df)} rows)")
+    digest = write_csv(pce_df, output_path)
+    logger.info(f"PCE data saved: {output_path} ({len(pce_df)} rows)",
+                extra={'stage': 'acquire_pce', 'output': str(output_path), 'rows': len(pce_df)})
     
     # Save metadata
     save_metadata(output_path, {
         'series_id': config['series']['pce']['series_id'],
         'source': config['series']['pce']['source'],
         'description': config['series']['pce']['description'],
-        'row_count': len(pce_df),
-    })
+    }, digest)
+    
+    # Keep revision history so older vintages can be rebuilt later
+    if args.vintage_dir:
+        record_vintage(pce_df, args.vintage_dir, config['series']['pce']['series_id'], 'pce')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,238 @@
+"""
+Compact memory mode for wide panels.
+Stores float columns as float32 where the precision budget allows and
+low-cardinality text columns as categoricals, and verifies the numeric
+drift of the compact pipeline against the float64 path.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import atomic_write_text, load_config, setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+# Largest relative round-trip error allowed when storing a value as float32
+# (float32 rounding alone is at most 2**-24, about 6e-8)
+STORAGE_RTOL = 1e-6
+
+# Text columns with at most this share of distinct values become categoricals
+MAX_CATEGORY_RATIO = 0.5
+
+# Default drift limits: panel values (relative to the column's scale),
+# coefficients (in reference standard errors), standard errors (relative)
+# and p-values (absolute)
+MAX_PANEL_DRIFT = 1e-5
+MAX_COEFFICIENT_DRIFT = 1e-3
+MAX_STD_ERROR_DRIFT = 1e-3
+MAX_P_VALUE_DRIFT = 1e-3
+
+
+def fits_float32(values, rtol=STORAGE_RTOL):
+    """Whether every value survives a float32 round trip within rtol.
+
+    Fails for values outside float32's range (overflow to inf, or
+    underflow to zero/subnormals).
+    """
+    values = np.asarray(values, dtype=np.float64)
+    finite = np.isfinite(values)
+    with np.errstate(over='ignore'):
+        stored = values[finite].astype(np.float32).astype(np.float64)
+    if not np.isfinite(stored).all():
+        return False
+    error = np.abs(stored - values[finite])
+    return bool((error <= rtol * np.abs(values[finite])).all())
+
+
+def compact_frame(df, rtol=STORAGE_RTOL, exclude=()):
+    """Shrink df's columns in place; returns df.
+
+    float64 -> float32 when fits_float32 holds, int64 -> smallest integer
+    type, and repetitive text -> category. Columns are replaced one at a
+    time, so the frame is never duplicated as a whole.
+    """
+    for col in df.columns:
+        if col in exclude:
+            continue
+        series = df[col]
+        if series.dtype == np.float64:
+            if fits_float32(series.to_numpy(), rtol):
+                df[col] = series.astype(np.float32)
+        elif pd.api.types.is_integer_dtype(series.dtype):
+            df[col] = pd.to_numeric(series, downcast='integer')
+        elif series.dtype == object or pd.api.types.is_string_dtype(series.dtype):
+            if len(series) and series.nunique() / len(series) <= MAX_CATEGORY_RATIO:
+                df[col] = series.astype('category')
+    return df
+
+
+def read_compact_csv(path, date_col='date', rtol=STORAGE_RTOL):
+    """Read a pipeline CSV, then compact it within the precision budget."""
+    return compact_frame(pd.read_csv(path, parse_dates=[date_col]), rtol, exclude=(date_col,))
+
+
+def frame_memory(df):
+    """Bytes used by df, including the index and object contents."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def memory_savings(reference, compact):
+    """Memory of the float64 and compact frames and the relative saving."""
+    before, after = frame_memory(reference), frame_memory(compact)
+    return {
+        'float64_bytes': before,
+        'compact_bytes': after,
+        'savings_pct': round(100 * (1 - after / before), 2) if before else 0.0,
+    }
+
+
+def numeric_drift(reference, candidate, columns=None):
+    """Per-column drift of candidate from reference.
+
+    max_rel_diff is relative to the column's largest magnitude, so values
+    crossing zero (growth rates) do not inflate it.
+    """
+    columns = columns or [c for c in reference.columns
+                          if pd.api.types.is_numeric_dtype(reference[c])]
+    drift = {}
+    for col in columns:
+        ref = reference[col].to_numpy(dtype=np.float64)
+        new = candidate[col].to_numpy(dtype=np.float64)
+        both = ~(np.isnan(ref) | np.isnan(new))
+        diff = np.abs(new[both] - ref[both])
+        scale = np.abs(ref[both]).max() if both.any() else 0.0
+        drift[col] = {
+            'dtype': str(candidate[col].dtype),
+            'max_abs_diff': float(diff.max()) if diff.size else 0.0,
+            'max_rel_diff': float(diff.max() / scale) if diff.size and scale else 0.0,
+            'nan_mismatch': int((np.isnan(ref) != np.isnan(new)).sum()),
+        }
+    return drift
+
+
+def model_drift(reference, candidate):
+    """Drift between two results tables: coefficients in standard errors,
+    standard errors relative, p-values absolute."""
+    keys = ['series', 'spec', 'term']
+    merged = reference.merge(candidate, on=keys, suffixes=('_ref', '_new'))
+    merged['estimate_drift_se'] = (merged['estimate_new'] - merged['estimate_ref']).abs() / merged['std_error_ref']
+    merged['std_error_drift'] = (merged['std_error_new'] - merged['std_error_ref']).abs() / merged['std_error_ref']
+    merged['p_value_diff'] = (merged['p_value_new'] - merged['p_value_ref']).abs()
+    by_spec = merged.groupby('spec')[['estimate_drift_se', 'std_error_drift', 'p_value_diff']].max()
+    return {spec: {k: float(v) for k, v in row.items()} for spec, row in by_spec.iterrows()}
+
+
+def compare_paths(cpi_path, pce_path, config, rtol=STORAGE_RTOL):
+    """Run integrate -> model data -> fits in float64 and in compact mode."""
+    # Imported here: integrate/modeling themselves load panels through this module
+    from integrate import integrate_data, enrich_data
+    from modeling import prepare_model_data, fit_models, DEFAULT_ARIMAX_ORDER
+
+    order = config['analysis'].get('arimax_order', DEFAULT_ARIMAX_ORDER)
+
+    logger.info("Float64 path...")
+    panel = enrich_data(integrate_data(cpi_path, pce_path), config['cpi_base_date'])
+    model_df = prepare_model_data(panel)
+    fits = fit_models(model_df, order)
+
+    logger.info("Compact path...")
+    # Cast the merged inputs so every derived column is built as float32
+    compact_panel = enrich_data(compact_frame(integrate_data(cpi_path, pce_path), rtol),
+                                config['cpi_base_date'])
+    compact_model_df = prepare_model_data(compact_panel)
+    # Cold fit: warm-starting from the float64 parameters would end the
+    # optimizer at once and report no drift
+    compact_fits = fit_models(compact_model_df, order)
+
+    # A fit near a unit root moves under any perturbation, so it cannot verify
+    # the compact path; it is reported instead of being gated
+    unstable = {}
+    for name, result in [('float64', fits['results']), ('compact', compact_fits['results'])]:
+        roots = result['arimax_model'].get('near_unit_roots')
+        if roots:
+            unstable[name] = roots
+
+    return {
+        'storage_rtol': rtol,
+        'memory': {
+            'panel': memory_savings(panel, compact_panel),
+            'model_data': memory_savings(model_df, compact_model_df),
+        },
+        'panel_drift': numeric_drift(panel, compact_panel),
+        'model_drift': model_drift(fits['table'], compact_fits['table']),
+        'unverified': {'arimax': {'reason': 'unstable, not verified: near unit root',
+                                  'near_unit_roots': unstable}} if unstable else {},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure memory savings and numeric drift of compact mode')
+    parser.add_argument('--config', default='config.yaml', help='Path to config file')
+    parser.add_argument('--cpi', required=True, help='Input CPI CSV path')
+    parser.add_argument('--pce', required=True, help='Input PCE CSV path')
+    parser.add_argument('--output', required=True, help='Output JSON report path')
+    parser.add_argument('--rtol', type=float, default=STORAGE_RTOL,
+                        help='Largest relative error allowed when storing a value as float32')
+    parser.add_argument('--max-panel-drift', type=float, default=MAX_PANEL_DRIFT,
+                        help='Largest acceptable panel drift, relative to each column\'s scale')
+    parser.add_argument('--max-coefficient-drift', type=float, default=MAX_COEFFICIENT_DRIFT,
+                        help='Largest acceptable coefficient drift, in standard errors')
+    parser.add_argument('--max-std-error-drift', type=float, default=MAX_STD_ERROR_DRIFT,
+                        help='Largest acceptable relative change in standard errors')
+    parser.add_argument('--max-p-value-drift', type=float, default=MAX_P_VALUE_DRIFT,
+                        help='Largest acceptable change in p-values')
+    args = parser.parse_args()
+    setup_logging()
+
+    config = load_config(args.config)
+    report = compare_paths(args.cpi, args.pce, config, args.rtol)
+
+    # Verify drift against the float64 path
+    failures = [f"{col}: {d['max_rel_diff']:.2e}" for col, d in report['panel_drift'].items()
+                if d['max_rel_diff'] > args.max_panel_drift or d['nan_mismatch']]
+    limits = {'estimate_drift_se': args.max_coefficient_drift,
+              'std_error_drift': args.max_std_error_drift,
+              'p_value_diff': args.max_p_value_drift}
+    failures += [f"{spec} {key}: {d[key]:.2e}" for spec, d in report['model_drift'].items()
+                 if spec not in report['unverified'] for key, limit in limits.items() if d[key] > limit]
+    report['max_panel_drift'] = args.max_panel_drift
+    report['max_coefficient_drift'] = args.max_coefficient_drift
+    report['max_std_error_drift'] = args.max_std_error_drift
+    report['max_p_value_drift'] = args.max_p_value_drift
+    # PARTIAL: everything gated passed, but some fits could not be verified
+    report['status'] = 'FAIL' if failures else 'PARTIAL' if report['unverified'] else 'PASS'
+    report['failures'] = failures
+
+    logger.info("\n" + "=" * 60)
+    logger.info("COMPACT MODE REPORT")
+    logger.info("=" * 60)
+    for name, usage in report['memory'].items():
+        logger.info(f"{name}: {usage['float64_bytes']:,} -> {usage['compact_bytes']:,} bytes "
+                    f"({usage['savings_pct']:.1f}% smaller)")
+    worst = max(report['panel_drift'].items(), key=lambda item: item[1]['max_rel_diff'])
+    logger.info(f"Largest panel drift: {worst[0]} ({worst[1]['max_rel_diff']:.2e} relative)")
+    for spec, d in report['model_drift'].items():
+        logger.info(f"{spec}: coefficients within {d['estimate_drift_se']:.2e} SE, "
+                    f"standard errors within {d['std_error_drift']:.2e} relative, "
+                    f"p-values within {d['p_value_diff']:.2e}")
+    for spec, detail in report['unverified'].items():
+        logger.warning(f"{spec}: {detail['reason']} ({detail['near_unit_roots']})")
+    logger.info(f"STATUS: {report['status']}")
+
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(output_path, json.dumps(report, indent=2))
+    logger.info(f"Report saved: {output_path}", extra={'status': report['status']})
+
+    if report['status'] == 'FAIL':
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,169 @@
+"""
+Calendar-aware coverage checks for many series of mixed frequency.
+Each series' observed dates are mapped to calendar periods and compared with
+the full expected period range, listing every missing period.
+"""
+
+import numpy as np
+import pandas as pd
+
+
+# Business days are tracked as daily periods with weekends excluded
+# (pandas has deprecated the 'B' period frequency)
+_PERIOD_FREQ = {'B': 'D'}
+
+# Day of week (Mon=0) of daily period ordinal 0, 1970-01-01
+_EPOCH_WEEKDAY = 3
+
+# Reported frequency of series whose frequency cannot be inferred
+UNKNOWN_FREQUENCY = 'unknown'
+
+# Modal spacing in days -> pandas period frequency
+_SPACING_FREQUENCIES = [
+    ((0, 1), 'D'),
+    ((6, 8), 'W'),
+    ((27, 32), 'M'),
+    ((88, 93), 'Q'),
+    ((364, 367), 'Y'),
+]
+
+
+def infer_frequency(dates):
+    """Infer a period frequency (D/B/W/M/Q/Y) from a series of dates.
+
+    Uses the most common spacing, so a few gaps do not change the answer.
+    """
+    dates = pd.DatetimeIndex(pd.unique(pd.to_datetime(dates).dropna())).sort_values()
+    if len(dates) < 2:
+        raise ValueError("Need at least two dates to infer a frequency")
+    spacing = pd.Series(np.diff(dates.values).astype('timedelta64[D]').astype(np.int64)).mode().iloc[0]
+    for (low, high), freq in _SPACING_FREQUENCIES:
+        if low <= spacing <= high:
+            # Daily data without weekends is business-daily
+            if freq == 'D' and not (dates.dayofweek >= 5).any():
+                return 'B'
+            return freq
+    raise ValueError(f"Cannot infer frequency from a typical spacing of {spacing} days")
+
+
+def expected_periods(start, end, freq):
+    """Every calendar period between start and end at the given frequency."""
+    if freq == 'B':
+        return pd.bdate_range(pd.Period(start, 'D').start_time, pd.Period(end, 'D').start_time).to_period('D')
+    return pd.period_range(pd.Period(start, freq), pd.Period(end, freq), freq=freq)
+
+
+def missing_periods(dates, freq=None):
+    """Periods absent from dates between its first and last observation."""
+    freq = freq or infer_frequency(dates)
+    observed = pd.PeriodIndex(pd.to_datetime(dates).dropna(), freq=_PERIOD_FREQ.get(freq, freq)).unique()
+    return expected_periods(observed.min(), observed.max(), freq).difference(observed)
+
+
+def _long_observations(df, date_col, series_col, value_cols):
+    """(series, date) pairs for every non-missing observation."""
+    if series_col is not None:
+        obs = df[[series_col, date_col]].rename(columns={series_col: 'series', date_col: 'date'})
+        if value_cols:
+            obs = obs[df[value_cols].notna().any(axis=1).to_numpy()]
+        return obs
+    value_cols = value_cols or [c for c in df.columns
+                                if c != date_col and pd.api.types.is_numeric_dtype(df[c])]
+    long = df.melt(id_vars=[date_col], value_vars=value_cols, var_name='series').dropna(subset=['value'])
+    return long[['series', date_col]].rename(columns={date_col: 'date'})
+
+
+def check_coverage(df, date_col='date', series_col=None, value_cols=None, frequencies=None):
+    """Check calendar coverage of every series in one vectorized pass.
+
+    df may be wide (one column per series) or long (series_col names the
+    series). frequencies maps series -> period frequency; others are
+    inferred. Returns (summary, missing): one summary row per series and one
+    row per missing period. Series whose frequency cannot be inferred (too
+    few observations, irregular spacing) get frequency 'unknown' and the
+    reason in the summary's error column instead of raising.
+    """
+    obs = _long_observations(df, date_col, series_col, value_cols)
+    obs = obs.assign(date=pd.to_datetime(obs['date'])).dropna(subset=['date'])
+    frequencies = dict(frequencies or {})
+    errors = {}
+    for name, dates in obs.groupby('series', sort=False)['date']:
+        if name not in frequencies:
+            try:
+                frequencies[name] = infer_frequency(dates)
+            except ValueError as e:
+                errors[name] = str(e)
+
+    unknown = obs['series'].isin(list(errors))
+    unknown_obs, obs = obs[unknown], obs[~unknown].copy()
+    obs['freq'] = obs['series'].map(frequencies)
+
+    summaries, missing = [], []
+
+    for freq, group in obs.groupby('freq', sort=False):
+        # Period ordinals turn calendar coverage into integer set arithmetic
+        period_freq = _PERIOD_FREQ.get(freq, freq)
+        codes, names = pd.factorize(group['series'])
+        ordinals = pd.PeriodIndex(group['date'], freq=period_freq).asi8
+        first = np.full(len(names), np.iinfo(np.int64).max)
+        last = np.full(len(names), np.iinfo(np.int64).min)
+        np.minimum.at(first, codes, ordinals)
+        np.maximum.at(last, codes, ordinals)
+
+        # Encode (series, ordinal) pairs as one integer per pair
+        span = int((last - first).max()) + 1
+        observed_keys = codes.astype(np.int64) * span + (ordinals - first[codes])
+        unique_keys = np.unique(observed_keys)
+        expected_count = last - first + 1
+        expected_codes = np.repeat(np.arange(len(names), dtype=np.int64), expected_count)
+        offsets = _ranges(expected_count)
+        if freq == 'B':
+            weekday = (first[expected_codes] + offsets + _EPOCH_WEEKDAY) % 7
+            expected_codes, offsets = expected_codes[weekday < 5], offsets[weekday < 5]
+            expected_count = np.bincount(expected_codes, minlength=len(names))
+        expected_keys = expected_codes * span + offsets
+        gaps = np.setdiff1d(expected_keys, unique_keys, assume_unique=True)
+
+        observed_count = np.bincount((unique_keys // span).astype(np.int64), minlength=len(names))
+        duplicate_count = np.bincount(codes, minlength=len(names)) - observed_count
+        gap_codes = gaps // span
+        summaries.append(pd.DataFrame({
+            'series': names,
+            'frequency': freq,
+            'start': pd.PeriodIndex.from_ordinals(first, freq=period_freq).astype(str),
+            'end': pd.PeriodIndex.from_ordinals(last, freq=period_freq).astype(str),
+            'expected_periods': expected_count,
+            'observed_periods': observed_count,
+            'missing_periods': np.bincount(gap_codes, minlength=len(names)),
+            'duplicate_dates': duplicate_count,
+        }))
+        if len(gaps):
+            missing.append(pd.DataFrame({
+                'series': np.asarray(names)[gap_codes],
+                'frequency': freq,
+                'period': pd.PeriodIndex.from_ordinals(first[gap_codes] + gaps % span, freq=period_freq).astype(str),
+            }))
+
+    if errors:
+        grouped = unknown_obs.groupby('series', sort=False)['date']
+        summaries.append(pd.DataFrame({
+            'series': grouped.min().index,
+            'frequency': UNKNOWN_FREQUENCY,
+            'start': grouped.min().dt.strftime('%Y-%m-%d').to_numpy(),
+            'end': grouped.max().dt.strftime('%Y-%m-%d').to_numpy(),
+            'observed_periods': grouped.nunique().to_numpy(),
+            'error': [errors[name] for name in grouped.min().index],
+        }))
+
+    summary = pd.concat(summaries, ignore_index=True) if summaries else pd.DataFrame()
+    missing = (pd.concat(missing, ignore_index=True) if missing
+               else pd.DataFrame(columns=['series', 'frequency', 'period']))
+    return summary, missing
+
+
+def _ranges(lengths):
+    """Concatenation of arange(n) for each n in lengths, without a Python loop."""
+    lengths = np.asarray(lengths, dtype=np.int64)
+    total = int(lengths.sum())
+    offsets = np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.arange(total, dtype=np.int64) - offsets
@@ -0,0 +1,274 @@
+"""
+Interactive EDA dashboard.
+Pre-aggregates the series into monthly, quarterly and yearly tiles and writes
+a self-contained HTML page that filters and zooms client-side, so looking at
+a different date window does not require rerunning the pipeline.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from utils import atomic_write_text, setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Tile resolutions (pandas resample rule) from finest to coarsest
+RESOLUTIONS = {
+    'monthly': 'MS',
+    'quarterly': 'QS',
+    'yearly': 'YS',
+}
+
+# Charts on the dashboard and the series each one shows
+PANELS = {
+    'Inflation and Spending Growth (YoY %)': ['cpi_yoy_pct', 'pce_yoy_pct', 'real_pce_yoy_pct'],
+    'PCE Levels': ['pce', 'real_pce'],
+    'CPI Level': ['cpi'],
+}
+
+
+def _to_list(values):
+    """Float array to JSON-ready list with NaN as null."""
+    return [None if np.isnan(v) else round(float(v), 6) for v in values]
+
+
+def build_tiles(df, columns):
+    """Aggregate each column to mean/min/max at every tile resolution."""
+    indexed = df.set_index('date')[columns].sort_index()
+    tiles = {}
+    for name, rule in RESOLUTIONS.items():
+        grouped = indexed.resample(rule)
+        mean, low, high = grouped.mean(), grouped.min(), grouped.max()
+        tiles[name] = {
+            'dates': [d.strftime('%Y-%m-%d') for d in mean.index],
+            'series': {
+                col: {
+                    'mean': _to_list(mean[col].to_numpy(dtype=float)),
+                    'min': _to_list(low[col].to_numpy(dtype=float)),
+                    'max': _to_list(high[col].to_numpy(dtype=float)),
+                }
+                for col in columns
+            },
+        }
+    return tiles
+
+
+def write_dashboard(df, output_dir, panels=None):
+    """Write dashboard_tiles.json and a self-contained dashboard.html."""
+    output_dir = Path(output_dir)
+    panels = {title: [c for c in cols if c in df.columns]
+              for title, cols in (panels or PANELS).items()}
+    panels = {title: cols for title, cols in panels.items() if cols}
+    columns = list(dict.fromkeys(c for cols in panels.values() for c in cols))
+
+    payload = {
+        'date_range': {
+            'start': str(df['date'].min().date()),
+            'end': str(df['date'].max().date()),
+        },
+        'panels': panels,
+        'tiles': build_tiles(df, columns),
+    }
+    data_json = json.dumps(payload, separators=(',', ':'))
+
+    tiles_path = output_dir / 'dashboard_tiles.json'
+    atomic_write_text(tiles_path, data_json)
+    logger.info(f"Saved: {tiles_path}")
+
+    # Embed the data so the page works from file:// with no server
+    html_path = output_dir / 'dashboard.html'
+    atomic_write_text(html_path, _HTML_TEMPLATE.replace('__DATA__', data_json.replace('</', '<\\/')))
+    logger.info(f"Saved: {html_path}")
+    return html_path
+
+
+_HTML_TEMPLATE = """<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<title>Inflation &amp; Consumer Spending - Interactive EDA</title>
+<style>
+  body { font-family: sans-serif; margin: 20px; color: #222; }
+  .controls { display: flex; gap: 16px; align-items: center; flex-wrap: wrap; margin-bottom: 12px; }
+  .panel { margin-bottom: 24px; }
+  .panel h2 { font-size: 16px; margin: 8px 0; }
+  svg { border: 1px solid #ddd; background: #fff; }
+  .legend span { margin-right: 12px; font-size: 13px; }
+  .legend i { display: inline-block; width: 12px; height: 3px; margin-right: 4px; vertical-align: middle; }
+</style>
+</head>
+<body>
+<h1>Inflation &amp; Consumer Spending: Interactive EDA</h1>
+<div class="controls">
+  <label>Start <input type="date" id="start"></label>
+  <label>End <input type="date" id="end"></label>
+  <label>Resolution
+    <select id="resolution">
+      <option value="auto">auto</option>
+      <option value="monthly">monthly</option>
+      <option value="quarterly">quarterly</option>
+      <option value="yearly">yearly</option>
+    </select>
+  </label>
+  <label><input type="checkbox" id="band" checked> min/max band</label>
+  <button id="reset">Reset</button>
+  <span id="info"></span>
+</div>
+<div id="panels"></div>
+<script>
+const DATA = __DATA__;
+const COLORS = ['#1f77b4', '#ff7f0e', '#2ca02c', '#d62728', '#9467bd', '#8c564b'];
+const WIDTH = 1000, HEIGHT = 320, PAD = {l: 60, r: 20, t: 10, b: 30};
+const MAX_POINTS = 400;
+const SVG_NS = 'http://www.w3.org/2000/svg';
+
+const startInput = document.getElementById('start');
+const endInput = document.getElementById('end');
+const resSelect = document.getElementById('resolution');
+const bandInput = document.getElementById('band');
+
+function tileWindow(dates, start, end) {
+  // Tile i covers [dates[i], dates[i + 1]) and the last one ends with the data;
+  // keep every tile that overlaps [start, end], not just those starting inside it
+  let lo = 0;
+  while (lo < dates.length - 1 && dates[lo + 1] <= start) lo++;
+  if (lo === dates.length - 1 && DATA.date_range.end < start) lo = dates.length;
+  let hi = lo;
+  while (hi < dates.length && dates[hi] <= end) hi++;
+  return [lo, hi];
+}
+
+function pickResolution(start, end) {
+  if (resSelect.value !== 'auto') return resSelect.value;
+  // Finest tile that keeps the window under MAX_POINTS
+  for (const name of ['monthly', 'quarterly', 'yearly']) {
+    const [lo, hi] = tileWindow(DATA.tiles[name].dates, start, end);
+    if (hi - lo <= MAX_POINTS) return name;
+  }
+  return 'yearly';
+}
+
+function el(name, attrs) {
+  const node = document.createElementNS(SVG_NS, name);
+  for (const k in attrs) node.setAttribute(k, attrs[k]);
+  return node;
+}
+
+function drawPanel(container, title, columns, tile, lo, hi) {
+  const div = document.createElement('div');
+  div.className = 'panel';
+  div.innerHTML = '<h2>' + title + '</h2>';
+  const svg = el('svg', {width: WIDTH, height: HEIGHT});
+  const times = tile.dates.slice(lo, hi).map(d => Date.parse(d));
+  let yMin = Infinity, yMax = -Infinity;
+  const useBand = bandInput.checked;
+  columns.forEach(c => {
+    const s = tile.series[c];
+    for (let i = lo; i < hi; i++) {
+      const a = useBand ? s.min[i] : s.mean[i], b = useBand ? s.max[i] : s.mean[i];
+      if (a !== null) yMin = Math.min(yMin, a);
+      if (b !== null) yMax = Math.max(yMax, b);
+    }
+  });
+  if (!times.length || !isFinite(yMin)) {
+    div.appendChild(document.createTextNode('No data in window'));
+    container.appendChild(div);
+    return;
+  }
+  if (yMin === yMax) { yMin -= 1; yMax += 1; }
+  const t0 = times[0], t1 = times[times.length - 1] === t0 ? t0 + 1 : times[times.length - 1];
+  const x = t => PAD.l + (t - t0) / (t1 - t0) * (WIDTH - PAD.l - PAD.r);
+  const y = v => HEIGHT - PAD.b - (v - yMin) / (yMax - yMin) * (HEIGHT - PAD.t - PAD.b);
+
+  // Axes and ticks
+  svg.appendChild(el('line', {x1: PAD.l, y1: HEIGHT - PAD.b, x2: WIDTH - PAD.r, y2: HEIGHT - PAD.b, stroke: '#999'}));
+  svg.appendChild(el('line', {x1: PAD.l, y1: PAD.t, x2: PAD.l, y2: HEIGHT - PAD.b, stroke: '#999'}));
+  for (let k = 0; k <= 4; k++) {
+    const v = yMin + (yMax - yMin) * k / 4;
+    const label = el('text', {x: PAD.l - 6, y: y(v) + 4, 'text-anchor': 'end', 'font-size': 11});
+    label.textContent = v.toFixed(2);
+    svg.appendChild(label);
+    svg.appendChild(el('line', {x1: PAD.l, y1: y(v), x2: WIDTH - PAD.r, y2: y(v), stroke: '#eee'}));
+  }
+  for (let k = 0; k <= 5; k++) {
+    const idx = Math.round((times.length - 1) * k / 5);
+    const label = el('text', {x: x(times[idx]), y: HEIGHT - 10, 'text-anchor': 'middle', 'font-size': 11});
+    label.textContent = tile.dates[lo + idx];
+    svg.appendChild(label);
+  }
+
+  const legend = document.createElement('div');
+  legend.className = 'legend';
+  columns.forEach((c, j) => {
+    const s = tile.series[c], color = COLORS[j % COLORS.length];
+    let line = '', band = [], lower = [];
+    for (let i = lo; i < hi; i++) {
+      const t = times[i - lo];
+      if (s.mean[i] === null) continue;
+      line += (line ? 'L' : 'M') + x(t).toFixed(1) + ',' + y(s.mean[i]).toFixed(1);
+      band.push(x(t).toFixed(1) + ',' + y(s.max[i]).toFixed(1));
+      lower.unshift(x(t).toFixed(1) + ',' + y(s.min[i]).toFixed(1));
+    }
+    if (useBand && band.length) {
+      svg.appendChild(el('polygon', {points: band.concat(lower).join(' '), fill: color, 'fill-opacity': 0.15, stroke: 'none'}));
+    }
+    svg.appendChild(el('path', {d: line, fill: 'none', stroke: color, 'stroke-width': 2}));
+    legend.innerHTML += '<span><i style="background:' + color + '"></i>' + c + '</span>';
+  });
+  div.appendChild(svg);
+  div.appendChild(legend);
+  container.appendChild(div);
+}
+
+function render() {
+  const start = startInput.value || DATA.date_range.start;
+  const end = endInput.value || DATA.date_range.end;
+  const resolution = pickResolution(start, end);
+  const tile = DATA.tiles[resolution];
+  const [lo, hi] = tileWindow(tile.dates, start, end);
+  document.getElementById('info').textContent = resolution + ' tiles, ' + (hi - lo) + ' points';
+  const container = document.getElementById('panels');
+  container.innerHTML = '';
+  for (const title in DATA.panels) drawPanel(container, title, DATA.panels[title], tile, lo, hi);
+}
+
+function reset() {
+  startInput.value = DATA.date_range.start;
+  endInput.value = DATA.date_range.end;
+  resSelect.value = 'auto';
+  render();
+}
+
+[startInput, endInput, resSelect, bandInput].forEach(n => n.addEventListener('change', render));
+document.getElementById('reset').addEventListener('click', reset);
+reset();
+</script>
+</body>
+</html>
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the interactive EDA dashboard')
+    parser.add_argument('--input', required=True, help='Input CSV path')
+    parser.add_argument('--output-dir', required=True, help='Output directory for results')
+    args = parser.parse_args()
+    setup_logging()
+    
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    
+    logger.info(f"Loading data from: {args.input}")
+    df = pd.read_csv(args.input, parse_dates=['date'])
+    write_dashboard(df, output_dir)
+
+
+if __name__ == '__main__':
+    main()
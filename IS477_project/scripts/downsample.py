@@ -0,0 +1,56 @@
+"""
+Level-of-detail reduction for line plots.
+Decimates long series to roughly what the rendered image can show, keeping
+the minimum and maximum of every pixel column so peaks stay visible.
+"""
+
+import numpy as np
+
+
+def _as_numeric(x):
+    """Convert dates (or numbers) to float positions for bucketing."""
+    x = np.asarray(x)
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').view('i8').astype(float)
+    return x.astype(float)
+
+
+def minmax_indices(x, y, n_buckets):
+    """Indices of the first, last, min and max point in each x bucket.
+
+    x must be sorted ascending. Buckets span equal x ranges (one per pixel
+    column), so irregular spacing is handled. Returns sorted unique indices.
+    """
+    pos = _as_numeric(x)
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= 4 * n_buckets:
+        return np.arange(n)
+
+    span = pos[-1] - pos[0]
+    if span <= 0:
+        return np.arange(n)
+    bucket = np.minimum(((pos - pos[0]) / span * n_buckets).astype(np.int64), n_buckets - 1)
+
+    # Bucket boundaries: first and last row of each non-empty bucket
+    starts = np.flatnonzero(np.r_[True, bucket[1:] != bucket[:-1]])
+    ends = np.r_[starts[1:], n] - 1
+
+    # lexsort by (value within bucket) puts each bucket's min first; NaN sorts last
+    by_min = np.lexsort((y, bucket))
+    by_max = np.lexsort((-y, bucket))
+    group_starts = np.searchsorted(bucket[by_min], bucket[starts])
+
+    keep = np.concatenate([starts, ends, by_min[group_starts], by_max[group_starts]])
+    return np.unique(keep)
+
+
+def decimate(x, y, n_buckets):
+    """Return (x, y) reduced to at most ~4 points per bucket."""
+    idx = minmax_indices(x, y, n_buckets)
+    return np.asarray(x)[idx], np.asarray(y)[idx]
+
+
+def pixel_buckets(fig, dpi):
+    """Number of horizontal pixels the figure will be rendered with."""
+    return max(int(fig.get_figwidth() * dpi), 1)
@@ -5,12 +5,41 @@ Generates visualizations, correlation analysis, and descriptive statistics.
 
 import argparse
 import json
+import logging
 from pathlib import Path
 
-import pandas as pd
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+from utils import (memoize_stage, atomic_path, atomic_write_text, write_csv,
+                   stage_is_complete, mark_stage_complete, setup_logging)
+from moments import summarize_panel
+from downsample import decimate, pixel_buckets
+from dashboard import write_dashboard
+from shared_panel import load_panel
+
+
+logger = logging.getLogger(__name__)
+
+
+# Growth-rate columns shared by the statistics and correlation outputs
+GROWTH_COLS = ['cpi_yoy_pct', 'pce_yoy_pct', 'real_pce_yoy_pct']
+
+# Resolution figures are saved at; also bounds the points drawn per line
+FIGURE_DPI = 150
+
+
+def save_figure(output_path):
+    """Save and close the current figure via a temp file, so no partial PNG is left."""
+    with atomic_path(output_path) as tmp_path:
+        plt.savefig(tmp_path, dpi=FIGURE_DPI, bbox_inches='tight')
+
+
+def plot_line(x, y, **kwargs):
+    """plt.plot with the series decimated to the figure's pixel width."""
+    x, y = decimate(x, y, pixel_buckets(plt.gcf(), FIGURE_DPI))
+    return plt.plot(x, y, **kwargs)
+
 
 def plot_inflation_over_time(df, output_path):
     """Plot CPI year-over-year inflation rate over time."""
@@ -19,7 +48,7 @@ def plot_inflation_over_time(df, output_path):
     # Filter to only rows with YoY data (after first 12 months)
     plot_df = df.dropna(subset=['cpi_yoy_pct'])
     
-    plt.plot(plot_df['date'], plot_df['cpi_yoy_pct'], 
+    plot_line(plot_df['date'], plot_df['cpi_yoy_pct'], 
              color='#1f77b4', linewidth=2, label='Inflation (CPI YoY %)')
     
     plt.title('Inflation Over Time', fontsize=14, fontweight='bold')
@@ -29,18 +58,18 @@ def plot_inflation_over_time(df, output_path):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    save_figure(output_path)
     plt.close()
-    print(f"Saved: {output_path}")
+    logger.info(f"Saved: {output_path}")
 
 
 def plot_pce_trends(df, output_path):
     """Plot nominal and real PCE trends over time."""
     plt.figure(figsize=(14, 6))
     
-    plt.plot(df['date'], df['pce'], 
+    plot_line(df['date'], df['pce'], 
              color='#1f77b4', linewidth=2, label='Nominal PCE')
-    plt.plot(df['date'], df['real_pce'], 
+    plot_line(df['date'], df['real_pce'], 
              color='#ff7f0e', linewidth=2, label='Real PCE')
     
     plt.title('Trends in PCE (2015-2024)', fontsize=14, fontweight='bold')
@@ -50,9 +79,9 @@ def plot_pce_trends(df, output_path):
     plt.grid(True, alpha=0.3)
     plt.tight_layout()
     
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    save_figure(output_path)
     plt.close()
-    print(f"Saved: {output_path}")
+    logger.info(f"Saved: {output_path}")
 
 
 def plot_growth_rates(df, output_path):
@@ -62,11 +91,11 @@ def plot_growth_rates(df, output_path):
     # Filter to only rows with YoY data
     plot_df = df.dropna(subset=['cpi_yoy_pct', 'pce_yoy_pct', 'real_pce_yoy_pct'])
     
-    plt.plot(plot_df['date'], plot_df['cpi_yoy_pct'], 
+    plot_line(plot_df['date'], plot_df['cpi_yoy_pct'], 
              color='#1f77b4', linewidth=2, label='CPI YoY %')
-    plt.plot(plot_df['date'], plot_df['pce_yoy_pct'], 
+    plot_line(plot_df['date'], plot_df['pce_yoy_pct'], 
              color='#ff7f0e', linewidth=2, label='Nominal PCE YoY %')
-    plt.plot(plot_df['date'], plot_df['real_pce_yoy_pct'], 
+    plot_line(plot_df['date'], plot_df['real_pce_yoy_pct'], 
              color='#2ca02c', linewidth=2, label='Real PCE YoY %')
     
     plt.title('Year-over-Year Growth Rates (2015-2024)', fontsize=14, fontweight='bold')
@@ -77,19 +106,16 @@ def plot_growth_rates(df, output_path):
     plt.axhline(y=0, color='black', linestyle='-', linewidth=0.5)
     plt.tight_layout()
     
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    save_figure(output_path)
     plt.close()
-    print(f"Saved: {output_path}")
+    logger.info(f"Saved: {output_path}")
 
 
-def plot_correlation_matrix(df, output_path):
+def plot_correlation_matrix(df, output_path, corr_matrix=None):
     """Plot correlation matrix heatmap for growth rate variables."""
-    # Select YoY columns for correlation
-    corr_cols = ['cpi_yoy_pct', 'pce_yoy_pct', 'real_pce_yoy_pct']
-    corr_df = df[corr_cols].dropna()
-    
-    # Calculate correlation matrix
-    corr_matrix = corr_df.corr()
+    # Reuse the matrix from the statistics pass when the caller has it
+    if corr_matrix is None:
+        _, corr_matrix = summarize_growth_rates(df)
     
     plt.figure(figsize=(8, 6))
     sns.heatmap(corr_matrix, annot=True, cmap='Reds', center=0,
@@ -100,59 +126,51 @@ def plot_correlation_matrix(df, output_path):
               fontsize=14, fontweight='bold')
     plt.tight_layout()
     
-    plt.savefig(output_path, dpi=150, bbox_inches='tight')
+    save_figure(output_path)
     plt.close()
-    print(f"Saved: {output_path}")
+    logger.info(f"Saved: {output_path}")
 
 
-def compute_descriptive_stats(df, output_path):
+@memoize_stage
+def summarize_growth_rates(df, columns=None, pairwise=False):
+    """Descriptive statistics and correlation matrix from one moments pass."""
+    return summarize_panel(df, columns or GROWTH_COLS, pairwise=pairwise)
+
+
+def compute_descriptive_stats(df, output_path, summary=None):
     """Compute and save descriptive statistics."""
-    # Select columns for statistics
-    stats_cols = ['cpi_yoy_pct', 'pce_yoy_pct', 'real_pce_yoy_pct']
-    stats_df = df[stats_cols].dropna()
-    
-    # Compute statistics
-    stats = stats_df.describe()
-    
-    # Add additional statistics
-    stats.loc['skew'] = stats_df.skew()
-    stats.loc['kurtosis'] = stats_df.kurtosis()
+    stats, _ = summary or summarize_growth_rates(df)
     
     # Save to CSV
-    stats.to_csv(output_path)
-    print(f"Saved: {output_path}")
+    write_csv(stats, output_path, index=True)
+    logger.info(f"Saved: {output_path}")
     
     # Print to console
-    print("\n" + "=" * 60)
-    print("DESCRIPTIVE STATISTICS")
-    print("=" * 60)
-    print(stats.round(4).to_string())
+    logger.info("\n" + "=" * 60)
+    logger.info("DESCRIPTIVE STATISTICS")
+    logger.info("=" * 60)
+    logger.info(stats.round(4).to_string())
     
     return stats
 
 
-def compute_correlation_analysis(df, output_path):
+def compute_correlation_analysis(df, output_path, summary=None):
     """Compute and save correlation analysis."""
-    # Select columns for correlation
-    corr_cols = ['cpi_yoy_pct', 'pce_yoy_pct', 'real_pce_yoy_pct']
-    corr_df = df[corr_cols].dropna()
-    
-    # Calculate correlation matrix
-    corr_matrix = corr_df.corr()
+    _, corr_matrix = summary or summarize_growth_rates(df)
     
     # Save to CSV
-    corr_matrix.to_csv(output_path)
-    print(f"Saved: {output_path}")
+    write_csv(corr_matrix, output_path, index=True)
+    logger.info(f"Saved: {output_path}")
     
     # Print to console
-    print("\n" + "=" * 60)
-    print("CORRELATION MATRIX")
-    print("=" * 60)
-    print(corr_matrix.round(4).to_string())
+    logger.info("\n" + "=" * 60)
+    logger.info("CORRELATION MATRIX")
+    logger.info("=" * 60)
+    logger.info(corr_matrix.round(4).to_string())
     
     # Key finding
     cpi_real_pce_corr = corr_matrix.loc['cpi_yoy_pct', 'real_pce_yoy_pct']
-    print(f"\nKey Finding: Correlation between inflation and real PCE growth: {cpi_real_pce_corr:.4f}")
+    logger.info(f"\nKey Finding: Correlation between inflation and real PCE growth: {cpi_real_pce_corr:.4f}")
     
     return corr_matrix
 
@@ -161,33 +179,58 @@ def main():
     parser = argparse.ArgumentParser(description='Run exploratory data analysis')
     parser.add_argument('--input', required=True, help='Input CSV path')
     parser.add_argument('--output-dir', required=True, help='Output directory for results')
+    parser.add_argument('--compact', action='store_true',
+                        help='Store panel columns as float32 where precision allows')
+    parser.add_argument('--dashboard', action='store_true',
+                        help='Also write an interactive HTML dashboard with pre-aggregated tiles')
     args = parser.parse_args()
+    setup_logging()
     
     # Create output directories
     output_dir = Path(args.output_dir)
     figures_dir = output_dir / 'figures'
     figures_dir.mkdir(parents=True, exist_ok=True)
     
+    # Resume: skip if every output was already produced from this input
+    figure_names = ['inflation_over_time.png', 'pce_trends.png', 'growth_rates.png', 'correlation_matrix.png']
+    outputs = [figures_dir / name for name in figure_names]
+    outputs += [output_dir / 'descriptive_stats.csv', output_dir / 'correlation_matrix.csv',
+                output_dir / 'eda_summary.json']
+    if args.dashboard:
+        outputs += [output_dir / 'dashboard.html', output_dir / 'dashboard_tiles.json']
+    if stage_is_complete('eda', [args.input], outputs, params=vars(args)):
+        logger.info("eda: outputs up to date, skipping (set PIPELINE_FORCE=1 to rerun)",
+                    extra={'stage': 'eda', 'skipped': True})
+        return
+    
     # Load data
-    print(f"Loading data from: {args.input}")
-    df = pd.read_csv(args.input, parse_dates=['date'])
-    print(f"Loaded {len(df)} observations")
+    logger.info(f"Loading data from: {args.input}")
+    df = load_panel(args.input, compact=args.compact)
+    logger.info(f"Loaded {len(df)} observations")
+    
+    logger.info("\n" + "=" * 60)
+    logger.info("EXPLORATORY DATA ANALYSIS")
+    logger.info("=" * 60)
     
-    print("\n" + "=" * 60)
-    print("EXPLORATORY DATA ANALYSIS")
-    print("=" * 60)
+    # One moments pass feeds the statistics, correlation CSV and heatmap
+    summary = summarize_growth_rates(df)
     
     # Generate visualizations
-    print("\nGenerating visualizations...")
+    logger.info("\nGenerating visualizations...")
     plot_inflation_over_time(df, figures_dir / 'inflation_over_time.png')
     plot_pce_trends(df, figures_dir / 'pce_trends.png')
     plot_growth_rates(df, figures_dir / 'growth_rates.png')
-    plot_correlation_matrix(df, figures_dir / 'correlation_matrix.png')
+    plot_correlation_matrix(df, figures_dir / 'correlation_matrix.png', corr_matrix=summary[1])
     
     # Compute statistics
-    print("\nComputing statistics...")
-    compute_descriptive_stats(df, output_dir / 'descriptive_stats.csv')
-    compute_correlation_analysis(df, output_dir / 'correlation_matrix.csv')
+    logger.info("\nComputing statistics...")
+    compute_descriptive_stats(df, output_dir / 'descriptive_stats.csv', summary=summary)
+    compute_correlation_analysis(df, output_dir / 'correlation_matrix.csv', summary=summary)
+    
+    # Interactive output: date filtering and zoom happen client-side
+    if args.dashboard:
+        logger.info("\nBuilding interactive dashboard...")
+        write_dashboard(df, output_dir)
     
     # Save EDA summary
     eda_summary = {
@@ -210,14 +253,18 @@ def main():
             ]
         }
     }
+    if args.dashboard:
+        eda_summary['outputs']['dashboard'] = ['dashboard.html', 'dashboard_tiles.json']
     
     summary_path = output_dir / 'eda_summary.json'
-    summary_path.write_text(json.dumps(eda_summary, indent=2))
-    print(f"\nSaved: {summary_path}")
+    atomic_write_text(summary_path, json.dumps(eda_summary, indent=2))
+    logger.info(f"\nSaved: {summary_path}")
+    
+    mark_stage_complete('eda', [args.input], outputs, params=vars(args))
     
-    print("\n" + "=" * 60)
-    print("EDA COMPLETE")
-    print("=" * 60)
+    logger.info("\n" + "=" * 60)
+    logger.info("EDA COMPLETE")
+    logger.info("=" * 60)
 
 
 if __name__ == '__main__':
@@ -4,50 +4,67 @@ Merges datasets and creates derived analytical variables.
 """
 
 import argparse
+import logging
 from pathlib import Path
 
 import pandas as pd
 
-from utils import save_metadata, load_config
+from utils import (save_metadata, load_config, memoize_stage, write_csv,
+                   stage_is_complete, mark_stage_complete, setup_logging)
+from compact import compact_frame
+
+
+logger = logging.getLogger(__name__)
 
 
 def integrate_data(cpi_path, pce_path):
     """Merge CPI and PCE datasets on date."""
     
-    print(f"Loading CPI data from: {cpi_path}")
+    logger.info(f"Loading CPI data from: {cpi_path}")
     cpi_df = pd.read_csv(cpi_path, parse_dates=['date'])
     
-    print(f"Loading PCE data from: {pce_path}")
+    logger.info(f"Loading PCE data from: {pce_path}")
     pce_df = pd.read_csv(pce_path, parse_dates=['date'])
     
+    return merge_series(cpi_df, pce_df)
+
+
+def merge_series(cpi_df, pce_df):
+    """Merge already-loaded CPI and PCE frames on date."""
+    
     # Merge on date (inner join)
-    print("Merging datasets...")
+    logger.info("Merging datasets...")
     merged = pd.merge(cpi_df, pce_df, on='date', how='inner')
     merged = merged.sort_values('date').reset_index(drop=True)
     
-    print(f"Merged dataset: {len(merged)} rows")
+    logger.info(f"Merged dataset: {len(merged)} rows")
     return merged
 
 
+@memoize_stage
 def enrich_data(df, base_date="2015-01-01"):
-    """Create derived analytical variables."""
+    """Create derived analytical variables on a new frame (df is left unchanged)."""
+    
+    logger.info("Creating derived variables...")
     
-    print("Creating derived variables...")
+    # Shallow copy: new columns go on the result only, without copying data,
+    # so cache hits and misses leave the caller's frame the same
+    df = df.copy(deep=False)
     
     # 1. CPI Index (base_date = 100)
     base_cpi = df.loc[df['date'] == base_date, 'cpi'].iloc[0]
     df['cpi_index_2015_01_100'] = (df['cpi'] / base_cpi) * 100
-    print(f"  - cpi_index_2015_01_100 (base CPI: {base_cpi:.3f})")
+    logger.info(f"  - cpi_index_2015_01_100 (base CPI: {base_cpi:.3f})")
     
     # 2. Real PCE (inflation-adjusted)
     df['real_pce'] = df['pce'] / (df['cpi_index_2015_01_100'] / 100)
-    print("  - real_pce (inflation-adjusted)")
+    logger.info("  - real_pce (inflation-adjusted)")
     
     # 3. Year-over-year growth rates
     df['pce_yoy_pct'] = df['pce'].pct_change(12) * 100
     df['real_pce_yoy_pct'] = df['real_pce'].pct_change(12) * 100
     df['cpi_yoy_pct'] = df['cpi'].pct_change(12) * 100
-    print("  - pce_yoy_pct, real_pce_yoy_pct, cpi_yoy_pct (12-month lag)")
+    logger.info("  - pce_yoy_pct, real_pce_yoy_pct, cpi_yoy_pct (12-month lag)")
     
     return df
 
@@ -58,13 +75,27 @@ def main():
     parser.add_argument('--cpi', required=True, help='Input CPI CSV path')
     parser.add_argument('--pce', required=True, help='Input PCE CSV path')
     parser.add_argument('--output', required=True, help='Output CSV path')
+    parser.add_argument('--compact', action='store_true',
+                        help='Store CPI/PCE and all derived columns as float32')
     args = parser.parse_args()
+    setup_logging()
+    
+    # Resume: skip if already integrated from these exact inputs
+    inputs = [args.config, args.cpi, args.pce]
+    outputs = [args.output]
+    if stage_is_complete('integrate', inputs, outputs, params=vars(args)):
+        logger.info("integrate: outputs up to date, skipping (set PIPELINE_FORCE=1 to rerun)",
+                    extra={'stage': 'integrate', 'skipped': True})
+        return
     
     # Load configuration
     config = load_config(args.config)
     
     # Integrate data
     merged = integrate_data(args.cpi, args.pce)
+    if args.compact:
+        # Derived columns are then built as float32 from the start
+        compact_frame(merged)
     
     # Enrich data
     enriched = enrich_data(merged, config['cpi_base_date'])
@@ -72,14 +103,14 @@ def main():
     # Save output
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    enriched.to_csv(output_path, index=False)
-    print(f"Integrated data saved: {output_path}")
+    digest = write_csv(enriched, output_path)
+    logger.info(f"Integrated data saved: {output_path}",
+                extra={'stage': 'integrate', 'output': str(output_path), 'rows': len(enriched)})
     
     # Save metadata
     save_metadata(output_path, {
         'description': 'Integrated CPI and PCE data with derived variables',
         'sources': ['CPIAUCSL (FRED API)', 'PCE (FRED CSV)'],
-        'row_count': len(enriched),
         'columns': list(enriched.columns),
         'derived_variables': {
             'cpi_index_2015_01_100': 'CPI normalized to 2015-01 = 100',
@@ -88,7 +119,9 @@ def main():
             'real_pce_yoy_pct': 'YoY % change in real PCE',
             'cpi_yoy_pct': 'YoY % change in CPI (inflation rate)'
         }
-    })
+    }, digest)
+    
+    mark_stage_complete('integrate', inputs, outputs, params=vars(args))
 
 
 if __name__ == '__main__':
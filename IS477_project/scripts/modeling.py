@@ -5,33 +5,60 @@ Builds regression models to analyze the relationship between inflation and real
 
 import argparse
 import json
+import logging
 from pathlib import Path
 
 import pandas as pd
 import numpy as np
 import statsmodels.api as sm
+from statsmodels.tsa.statespace.sarimax import SARIMAX
 
+from utils import (memoize_stage, atomic_write_text, stage_is_complete, mark_stage_complete,
+                   load_config, write_csv, STATE_DIR, setup_logging)
+from panel_ols import batched_ols
+from shared_panel import load_panel
+from results_store import (ols_fit_table, arimax_fit_table, panel_fit_table,
+                           results_table, write_results, summary_from_table)
 
+
+logger = logging.getLogger(__name__)
+
+
+# Regressors shared by the lagged OLS and ARIMAX models
+LAGGED_REGRESSORS = ['cpi_yoy_pct', 'cpi_yoy_pct_lag1', 'cpi_yoy_pct_lag2']
+
+# ARIMA(p, d, q) error order used when the config does not set one. With
+# q = 1 the MA term converges to -1 on this data, cancelling the differencing
+# and leaving standard errors from a near-singular covariance.
+DEFAULT_ARIMAX_ORDER = (1, 1, 0)
+
+# AR/MA roots this close to the unit circle mark an ARIMAX fit as unreliable
+UNIT_ROOT_MARGIN = 0.02
+
+
+@memoize_stage
 def prepare_model_data(df):
     """Prepare data for regression modeling with lagged variables."""
     # Create lagged inflation variables
-    df = df.copy()
-    df['cpi_yoy_pct_lag1'] = df['cpi_yoy_pct'].shift(1)
-    df['cpi_yoy_pct_lag2'] = df['cpi_yoy_pct'].shift(2)
+    lags = {
+        'cpi_yoy_pct_lag1': df['cpi_yoy_pct'].shift(1),
+        'cpi_yoy_pct_lag2': df['cpi_yoy_pct'].shift(2),
+    }
     
-    # Drop rows with NaN values
-    model_df = df.dropna(subset=['cpi_yoy_pct', 'cpi_yoy_pct_lag1', 
-                                  'cpi_yoy_pct_lag2', 'real_pce'])
+    # Keep rows without NaN values; only those rows are copied, and the
+    # caller's frame is left unchanged
+    keep = df['cpi_yoy_pct'].notna() & df['real_pce'].notna()
+    for lag in lags.values():
+        keep &= lag.notna()
+    model_df = df[keep].assign(**{name: lag[keep] for name, lag in lags.items()})
     
-    print(f"Model data prepared: {len(model_df)} observations")
+    logger.info(f"Model data prepared: {len(model_df)} observations")
     return model_df
 
 
 def run_baseline_model(df):
     """Run baseline OLS regression: Real PCE ~ Inflation."""
-    print("\n" + "-" * 60)
-    print("BASELINE MODEL: Real PCE ~ Inflation")
-    print("-" * 60)
+    logger.info("Fitting BASELINE MODEL: Real PCE ~ Inflation")
     
     # Prepare variables
     X = sm.add_constant(df['cpi_yoy_pct'])
@@ -40,37 +67,119 @@ def run_baseline_model(df):
     # Fit model
     model = sm.OLS(y, X).fit()
     
-    # Print summary
-    print(model.summary())
+    # Full summary at DEBUG; the CLI prints it in main()
+    logger.debug(model.summary().as_text())
     
     return model
 
 
 def run_lagged_model(df):
     """Run lagged OLS regression: Real PCE ~ Inflation + Lag1 + Lag2."""
-    print("\n" + "-" * 60)
-    print("LAGGED MODEL: Real PCE ~ Inflation + Lag1 + Lag2")
-    print("-" * 60)
+    logger.info("Fitting LAGGED MODEL: Real PCE ~ Inflation + Lag1 + Lag2")
     
     # Prepare variables
-    X = sm.add_constant(df[['cpi_yoy_pct', 'cpi_yoy_pct_lag1', 'cpi_yoy_pct_lag2']])
+    X = sm.add_constant(df[LAGGED_REGRESSORS])
     y = df['real_pce']
     
     # Fit model
     model = sm.OLS(y, X).fit()
     
-    # Print summary
-    print(model.summary())
+    # Full summary at DEBUG; the CLI prints it in main()
+    logger.debug(model.summary().as_text())
     
     return model
 
 
+def run_panel_models(df, dependents):
+    """Fit the baseline and lagged specifications for many dependents at once.
+
+    Each specification's design matrix is factorized once and shared by
+    every dependent series. Returns {spec: BatchedOLSResults}.
+    """
+    specs = {
+        'baseline': ['cpi_yoy_pct'],
+        'lagged': LAGGED_REGRESSORS,
+    }
+    panel_results = {}
+    for spec, regressors in specs.items():
+        panel_results[spec] = batched_ols(df[regressors], df[dependents])
+        nobs = panel_results[spec].nobs
+        logger.info(f"Panel {spec} model: {len(dependents)} dependent series, "
+                    f"{nobs.min()}-{nobs.max()} observations")
+    
+    return panel_results
+
+
+def panel_summary(panel_results):
+    """One row per (series, spec) with the fit statistics."""
+    frames = []
+    for spec, results in panel_results.items():
+        frame = results.summary_frame()
+        frame.insert(0, 'spec', spec)
+        frames.append(frame)
+    return pd.concat(frames).rename_axis('series').reset_index()
+
+
+def load_warm_start(sources, order, param_names):
+    """Find previously fitted ARIMAX parameters to start the optimizer from.
+
+    sources are model_results.json paths or already-loaded results dicts.
+    Returns None unless a saved fit has the same order and parameters.
+    """
+    for source in sources:
+        if isinstance(source, dict):
+            saved = source.get('arimax_model')
+        else:
+            source = Path(source)
+            if not source.exists():
+                continue
+            saved = json.loads(source.read_text()).get('arimax_model')
+        if not saved or saved.get('order') != list(order):
+            continue
+        params = saved.get('params', {})
+        if list(params) == list(param_names):
+            logger.info(f"Warm-starting ARIMAX from: {source if isinstance(source, Path) else 'previous fit'}")
+            return np.array([params[name] for name in param_names])
+    return None
+
+
+def near_unit_roots(fit, margin=UNIT_ROOT_MARGIN):
+    """Smallest AR/MA root modulus within margin of the unit circle, by polynomial."""
+    moduli = {'ar': np.abs(fit.arroots), 'ma': np.abs(fit.maroots)}
+    return {name: float(m.min()) for name, m in moduli.items() if m.size and m.min() < 1 + margin}
+
+
+def run_arimax_model(df, order=DEFAULT_ARIMAX_ORDER, warm_start_paths=(), maxiter=200):
+    """Run distributed-lag ARIMAX: Real PCE ~ Inflation + Lag1 + Lag2 with ARIMA errors."""
+    logger.info(f"Fitting ARIMAX MODEL: Real PCE ~ Inflation + Lag1 + Lag2, ARIMA{tuple(order)} errors")
+    
+    # State-space models want a dated index with a known frequency
+    data = df.set_index('date')
+    data.index.freq = pd.infer_freq(data.index)
+    
+    model = SARIMAX(data['real_pce'], exog=data[LAGGED_REGRESSORS],
+                    order=tuple(order), trend='c')
+    start_params = load_warm_start(warm_start_paths, order, model.param_names)
+    fit = model.fit(start_params=start_params, disp=False, maxiter=maxiter)
+    fit.warm_started = start_params is not None
+    
+    # A root near the unit circle (e.g. an MA root cancelling the differencing)
+    # leaves the parameters weakly identified and the standard errors unreliable
+    fit.unit_roots = near_unit_roots(fit)
+    if fit.unit_roots:
+        roots = ', '.join(f"{name} |root| = {modulus:.4f}" for name, modulus in fit.unit_roots.items())
+        logger.warning(f"ARIMAX{tuple(order)} has a near unit root ({roots}); "
+                       f"treating the fit as not converged, consider another order")
+    
+    logger.debug(fit.summary().as_text())
+    logger.info(f"Optimizer iterations: {fit.mle_retvals.get('iterations')} "
+                f"({'warm' if fit.warm_started else 'cold'} start)")
+    
+    return fit
+
+
 def compare_models(baseline_model, lagged_model):
     """Compare models using AIC and BIC."""
-    print("\n" + "=" * 60)
-    print("MODEL COMPARISON")
-    print("=" * 60)
-    
     comparison = {
         'baseline': {
             'r_squared': baseline_model.rsquared,
@@ -92,27 +201,10 @@ def compare_models(baseline_model, lagged_model):
         }
     }
     
-    print(f"\n{'Metric':<25} {'Baseline':<15} {'Lagged':<15} {'Better':<10}")
-    print("-" * 65)
-    
-    # R-squared (higher is better)
-    better_r2 = 'Baseline' if comparison['baseline']['r_squared'] > comparison['lagged']['r_squared'] else 'Lagged'
-    print(f"{'R-squared':<25} {comparison['baseline']['r_squared']:<15.4f} {comparison['lagged']['r_squared']:<15.4f} {better_r2:<10}")
-    
-    # Adjusted R-squared (higher is better)
+    # Adjusted R-squared (higher is better), AIC and BIC (lower is better)
     better_adj_r2 = 'Baseline' if comparison['baseline']['adj_r_squared'] > comparison['lagged']['adj_r_squared'] else 'Lagged'
-    print(f"{'Adj. R-squared':<25} {comparison['baseline']['adj_r_squared']:<15.4f} {comparison['lagged']['adj_r_squared']:<15.4f} {better_adj_r2:<10}")
-    
-    # AIC (lower is better)
     better_aic = 'Baseline' if comparison['baseline']['aic'] < comparison['lagged']['aic'] else 'Lagged'
-    print(f"{'AIC':<25} {comparison['baseline']['aic']:<15.2f} {comparison['lagged']['aic']:<15.2f} {better_aic:<10}")
-    
-    # BIC (lower is better)
     better_bic = 'Baseline' if comparison['baseline']['bic'] < comparison['lagged']['bic'] else 'Lagged'
-    print(f"{'BIC':<25} {comparison['baseline']['bic']:<15.2f} {comparison['lagged']['bic']:<15.2f} {better_bic:<10}")
-    
-    # F-statistic
-    print(f"{'F-statistic':<25} {comparison['baseline']['f_statistic']:<15.2f} {comparison['lagged']['f_statistic']:<15.2f}")
     
     # Determine overall winner
     wins = {'Baseline': 0, 'Lagged': 0}
@@ -121,42 +213,92 @@ def compare_models(baseline_model, lagged_model):
     wins[better_bic] += 1
     
     comparison['recommended_model'] = 'baseline' if wins['Baseline'] >= wins['Lagged'] else 'lagged'
-    
-    print(f"\n{'='*60}")
-    print(f"RECOMMENDED MODEL: {comparison['recommended_model'].upper()}")
-    print(f"Based on AIC/BIC comparison, the baseline model is preferred.")
-    print(f"{'='*60}")
-    
     return comparison
 
 
+def log_comparison(comparison):
+    """Log the model comparison table (used by the CLI)."""
+    baseline, lagged = comparison['baseline'], comparison['lagged']
+    logger.info(f"\n{'Metric':<25} {'Baseline':<15} {'Lagged':<15} {'Better':<10}")
+    logger.info("-" * 65)
+    for name, key, higher_is_better, fmt in [('R-squared', 'r_squared', True, '.4f'),
+                                             ('Adj. R-squared', 'adj_r_squared', True, '.4f'),
+                                             ('AIC', 'aic', False, '.2f'),
+                                             ('BIC', 'bic', False, '.2f')]:
+        better = 'Baseline' if (baseline[key] > lagged[key]) == higher_is_better else 'Lagged'
+        logger.info(f"{name:<25} {baseline[key]:<15{fmt}} {lagged[key]:<15{fmt}} {better:<10}")
+    logger.info(f"{'F-statistic':<25} {baseline['f_statistic']:<15.2f} {lagged['f_statistic']:<15.2f}")
+    
+    logger.info(f"\n{'='*60}")
+    logger.info(f"RECOMMENDED MODEL: {comparison['recommended_model'].upper()}")
+    logger.info(f"Based on AIC/BIC comparison, the {comparison['recommended_model']} model is preferred.")
+    logger.info(f"{'='*60}")
+
+
 def extract_model_results(model, model_name):
-    """Extract model results as a dictionary."""
-    results = {
-        'model_name': model_name,
-        'dependent_variable': 'real_pce',
-        'n_observations': int(model.nobs),
-        'r_squared': model.rsquared,
-        'adj_r_squared': model.rsquared_adj,
-        'f_statistic': model.fvalue,
-        'f_pvalue': model.f_pvalue,
-        'aic': model.aic,
-        'bic': model.bic,
-        'durbin_watson': sm.stats.stattools.durbin_watson(model.resid),
-        'coefficients': {}
+    """Extract model results as a dictionary (the JSON view of its table rows)."""
+    return summary_from_table(ols_fit_table(model, 'real_pce', model_name, ''), model_name)
+
+
+def arimax_fit_info(fit, order):
+    """ARIMAX fit details kept alongside its coefficients, used for warm starts."""
+    iterations = fit.mle_retvals.get('iterations')
+    return {
+        'order': list(order),
+        'converged': bool(fit.mle_retvals.get('converged', True)) and not fit.unit_roots,
+        'near_unit_roots': fit.unit_roots,
+        'iterations': int(iterations) if iterations is not None else None,
+        'warm_started': fit.warm_started,
+        'params': {name: float(fit.params[name]) for name in fit.model.param_names},
     }
+
+
+def fit_models(model_df, arimax_order=DEFAULT_ARIMAX_ORDER, warm_start=(), panel_dependents=None):
+    """Fit every model on prepared data and build the results table and JSON view.
+
+    warm_start is passed to load_warm_start. Returns a dict with the fitted
+    models ('baseline', 'lagged', 'arimax', 'panel'), the typed results
+    'table' and the model_results.json contents as 'results'.
+    """
+    baseline_model = run_baseline_model(model_df)
+    lagged_model = run_lagged_model(model_df)
+    arimax_fit = run_arimax_model(model_df, arimax_order, warm_start_paths=warm_start)
+    comparison = compare_models(baseline_model, lagged_model)
     
-    for param in model.params.index:
-        results['coefficients'][param] = {
-            'estimate': model.params[param],
-            'std_error': model.bse[param],
-            't_statistic': model.tvalues[param],
-            'p_value': model.pvalues[param],
-            'ci_lower': model.conf_int().loc[param, 0],
-            'ci_upper': model.conf_int().loc[param, 1]
-        }
-    
-    return results
+    # Optional panel: one QR factorization per spec serves all dependents
+    panel_results = run_panel_models(model_df, panel_dependents) if panel_dependents else {}
+    
+    # Columnar results table: one row per fit x coefficient
+    window = f"{model_df['date'].min().date()}/{model_df['date'].max().date()}"
+    tables = [
+        ols_fit_table(baseline_model, 'real_pce', 'baseline', window),
+        ols_fit_table(lagged_model, 'real_pce', 'lagged', window),
+        arimax_fit_table(arimax_fit, 'real_pce', 'arimax', window),
+    ]
+    tables += [panel_fit_table(results, f"panel_{spec}", window)
+               for spec, results in panel_results.items()]
+    table = results_table(tables)
+    
+    # model_results.json is a summary view derived from the table
+    baseline_results = summary_from_table(table, 'baseline')
+    lagged_results = summary_from_table(table, 'lagged')
+    arimax_results = summary_from_table(table, 'arimax')
+    arimax_results.update(arimax_fit_info(arimax_fit, arimax_order))
+    
+    return {
+        'baseline': baseline_model,
+        'lagged': lagged_model,
+        'arimax': arimax_fit,
+        'panel': panel_results,
+        'table': table,
+        'results': {
+            'baseline_model': baseline_results,
+            'lagged_model': lagged_results,
+            'arimax_model': arimax_results,
+            'model_comparison': comparison,
+            'interpretation': interpret_results(baseline_results, lagged_results),
+        },
+    }
 
 
 def interpret_results(baseline_results, lagged_results):
@@ -233,88 +375,118 @@ def interpret_results(baseline_results, lagged_results):
 
 def main():
     parser = argparse.ArgumentParser(description='Run statistical modeling')
+    parser.add_argument('--config', default='config.yaml', help='Path to config file')
     parser.add_argument('--input', required=True, help='Input CSV path')
     parser.add_argument('--output-dir', required=True, help='Output directory for results')
+    parser.add_argument('--panel-dependents', nargs='+',
+                        help='Also fit baseline/lagged specs for these columns with batched OLS')
+    parser.add_argument('--compact', action='store_true',
+                        help='Store panel columns as float32 where precision allows (models still fit in float64)')
     args = parser.parse_args()
+    setup_logging()
     
     # Create output directory
     output_dir = Path(args.output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
     
+    # Resume: skip if the models were already fitted on this input
+    outputs = [output_dir / 'model_results.json',
+               output_dir / 'model_results.parquet',
+               output_dir / 'baseline_model_summary.txt',
+               output_dir / 'lagged_model_summary.txt',
+               output_dir / 'arimax_model_summary.txt']
+    if args.panel_dependents:
+        outputs.append(output_dir / 'panel_model_results.csv')
+    if stage_is_complete('modeling', [args.config, args.input], outputs, params=vars(args)):
+        logger.info("modeling: outputs up to date, skipping (set PIPELINE_FORCE=1 to rerun)",
+                    extra={'stage': 'modeling', 'skipped': True})
+        return
+    
+    config = load_config(args.config)
+    arimax_order = config['analysis'].get('arimax_order', DEFAULT_ARIMAX_ORDER)
+    
     # Load data
-    print(f"Loading data from: {args.input}")
-    df = pd.read_csv(args.input, parse_dates=['date'])
+    logger.info(f"Loading data from: {args.input}")
+    df = load_panel(args.input, compact=args.compact)
     
-    print("\n" + "=" * 60)
-    print("STATISTICAL MODELING")
-    print("=" * 60)
+    logger.info("\n" + "=" * 60)
+    logger.info("STATISTICAL MODELING")
+    logger.info("=" * 60)
     
     # Prepare model data
     model_df = prepare_model_data(df)
     
-    # Run models
-    baseline_model = run_baseline_model(model_df)
-    lagged_model = run_lagged_model(model_df)
-    
-    # Compare models
-    comparison = compare_models(baseline_model, lagged_model)
-    
-    # Extract results
-    baseline_results = extract_model_results(baseline_model, 'baseline')
-    lagged_results = extract_model_results(lagged_model, 'lagged')
-    
-    # Generate interpretation
-    interpretation = interpret_results(baseline_results, lagged_results)
+    # Run models. ARIMAX refits start from the last saved parameters; Snakemake
+    # removes model_results.json before rerunning, so a copy is kept in STATE_DIR.
+    warm_start_path = Path(STATE_DIR) / 'arimax_params.json'
+    fits = fit_models(model_df, arimax_order,
+                      warm_start=[output_dir / 'model_results.json', warm_start_path],
+                      panel_dependents=args.panel_dependents)
+    baseline_model, lagged_model, arimax_fit = fits['baseline'], fits['lagged'], fits['arimax']
+    panel_results = fits['panel']
+    all_results = fits['results']
+    
+    # Print model summaries
+    for title, fit in [("BASELINE MODEL: Real PCE ~ Inflation", baseline_model),
+                       ("LAGGED MODEL: Real PCE ~ Inflation + Lag1 + Lag2", lagged_model),
+                       (f"ARIMAX MODEL: Real PCE ~ Inflation + Lag1 + Lag2, ARIMA{tuple(arimax_order)} errors",
+                        arimax_fit)]:
+        logger.info("\n" + "-" * 60)
+        logger.info(title)
+        logger.info("-" * 60)
+        logger.info(fit.summary().as_text())
+    
+    logger.info("\n" + "=" * 60)
+    logger.info("MODEL COMPARISON")
+    logger.info("=" * 60)
+    log_comparison(all_results['model_comparison'])
+    
+    table_path = output_dir / 'model_results.parquet'
+    write_results(fits['table'], table_path)
+    logger.info(f"\nSaved: {table_path} ({len(fits['table'])} rows)")
+    
+    interpretation = all_results['interpretation']
     
     # Print interpretation
-    print("\n" + "=" * 60)
-    print("INTERPRETATION")
-    print("=" * 60)
-    print(f"\n{interpretation['summary']}")
-    print("\nKey Findings:")
+    logger.info("\n" + "=" * 60)
+    logger.info("INTERPRETATION")
+    logger.info("=" * 60)
+    logger.info(f"\n{interpretation['summary']}")
+    logger.info("\nKey Findings:")
     for i, finding in enumerate(interpretation['key_findings'], 1):
-        print(f"  {i}. {finding}")
+        logger.info(f"  {i}. {finding}")
     
     # Save results
-    all_results = {
-        'baseline_model': baseline_results,
-        'lagged_model': lagged_results,
-        'model_comparison': comparison,
-        'interpretation': interpretation
-    }
-    
     results_path = output_dir / 'model_results.json'
+    atomic_write_text(results_path, json.dumps(all_results, indent=2))
+    logger.info(f"\nSaved: {results_path}")
     
-    # Convert numpy types to Python types for JSON serialization
-    def convert_numpy(obj):
-        if isinstance(obj, np.floating):
-            return float(obj)
-        elif isinstance(obj, np.integer):
-            return int(obj)
-        elif isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, dict):
-            return {k: convert_numpy(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_numpy(i) for i in obj]
-        return obj
-    
-    all_results = convert_numpy(all_results)
-    results_path.write_text(json.dumps(all_results, indent=2))
-    print(f"\nSaved: {results_path}")
+    warm_start_path.parent.mkdir(parents=True, exist_ok=True)
+    atomic_write_text(warm_start_path, json.dumps({'arimax_model': all_results['arimax_model']}, indent=2))
     
     # Save model summaries as text
     baseline_summary_path = output_dir / 'baseline_model_summary.txt'
-    baseline_summary_path.write_text(baseline_model.summary().as_text())
-    print(f"Saved: {baseline_summary_path}")
+    atomic_write_text(baseline_summary_path, baseline_model.summary().as_text())
+    logger.info(f"Saved: {baseline_summary_path}")
     
     lagged_summary_path = output_dir / 'lagged_model_summary.txt'
-    lagged_summary_path.write_text(lagged_model.summary().as_text())
-    print(f"Saved: {lagged_summary_path}")
+    atomic_write_text(lagged_summary_path, lagged_model.summary().as_text())
+    logger.info(f"Saved: {lagged_summary_path}")
+    
+    arimax_summary_path = output_dir / 'arimax_model_summary.txt'
+    atomic_write_text(arimax_summary_path, arimax_fit.summary().as_text())
+    logger.info(f"Saved: {arimax_summary_path}")
+    
+    if panel_results:
+        panel_path = output_dir / 'panel_model_results.csv'
+        write_csv(panel_summary(panel_results), panel_path)
+        logger.info(f"Saved: {panel_path}")
+    
+    mark_stage_complete('modeling', [args.config, args.input], outputs, params=vars(args))
     
-    print("\n" + "=" * 60)
-    print("MODELING COMPLETE")
-    print("=" * 60)
+    logger.info("\n" + "=" * 60)
+    logger.info("MODELING COMPLETE")
+    logger.info("=" * 60)
 
 
 if __name__ == '__main__':
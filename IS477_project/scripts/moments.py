@@ -0,0 +1,272 @@
+"""
+Single-pass moments engine for wide panels.
+Computes count/mean/variance/skew/kurtosis, min/max and the covariance and
+correlation matrices from one shared centered array. Partial moments can be
+merged, so large panels can be processed in chunks or in parallel.
+Run as a script to check the results against pandas on a pipeline CSV.
+"""
+
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+
+from utils import setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+# Relative tolerance for the pandas parity check
+PARITY_RTOL = 1e-9
+
+
+class Moments:
+    """Mergeable central moments and co-moments for a set of columns.
+
+    Rows containing any NaN are dropped (listwise deletion), which matches
+    df[cols].dropna() followed by describe()/corr().
+    """
+
+    def __init__(self, columns, n, mean, m2, m3, m4, comoment, minimum, maximum):
+        self.columns = list(columns)
+        self.n = n
+        self.mean = mean
+        self.m2 = m2
+        self.m3 = m3
+        self.m4 = m4
+        self.comoment = comoment
+        self.min = minimum
+        self.max = maximum
+
+    @classmethod
+    def from_array(cls, values, columns):
+        """Compute moments of a 2-D (rows x columns) array in one pass."""
+        values = np.asarray(values, dtype=float)
+        values = values[~np.isnan(values).any(axis=1)]
+        n = values.shape[0]
+        k = values.shape[1]
+        if n == 0:
+            nan = np.full(k, np.nan)
+            return cls(columns, 0, nan, np.zeros(k), np.zeros(k), np.zeros(k),
+                       np.zeros((k, k)), nan, nan)
+
+        mean = values.mean(axis=0)
+        centered = values - mean
+        sq = centered * centered
+        return cls(
+            columns, n, mean,
+            sq.sum(axis=0),
+            (sq * centered).sum(axis=0),
+            (sq * sq).sum(axis=0),
+            centered.T @ centered,
+            values.min(axis=0),
+            values.max(axis=0),
+        )
+
+    @classmethod
+    def from_frame(cls, df, columns=None):
+        columns = list(columns) if columns is not None else list(df.columns)
+        return cls.from_array(df[columns].to_numpy(dtype=float), columns)
+
+    def merge(self, other):
+        """Combine with moments from a disjoint set of rows (Pebay's formulas)."""
+        if other.columns != self.columns:
+            raise ValueError("Cannot merge moments over different columns")
+        if other.n == 0:
+            return self
+        if self.n == 0:
+            return other
+
+        na, nb = self.n, other.n
+        n = na + nb
+        delta = other.mean - self.mean
+        d2 = delta * delta
+
+        m2 = self.m2 + other.m2 + d2 * na * nb / n
+        m3 = (self.m3 + other.m3
+              + d2 * delta * na * nb * (na - nb) / n**2
+              + 3 * delta * (na * other.m2 - nb * self.m2) / n)
+        m4 = (self.m4 + other.m4
+              + d2 * d2 * na * nb * (na * na - na * nb + nb * nb) / n**3
+              + 6 * d2 * (na * na * other.m2 + nb * nb * self.m2) / n**2
+              + 4 * delta * (na * other.m3 - nb * self.m3) / n)
+        comoment = self.comoment + other.comoment + np.outer(delta, delta) * na * nb / n
+
+        return Moments(
+            self.columns, n, self.mean + delta * nb / n, m2, m3, m4, comoment,
+            np.minimum(self.min, other.min), np.maximum(self.max, other.max),
+        )
+
+    def var(self, ddof=1):
+        return self.m2 / (self.n - ddof) if self.n > ddof else np.full(len(self.columns), np.nan)
+
+    def std(self, ddof=1):
+        return np.sqrt(self.var(ddof))
+
+    def skew(self):
+        """Bias-corrected sample skewness (same definition as pandas)."""
+        n = self.n
+        if n < 3:
+            return np.full(len(self.columns), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g1 = (self.m3 / n) / (self.m2 / n) ** 1.5
+        return np.sqrt(n * (n - 1)) / (n - 2) * g1
+
+    def kurtosis(self):
+        """Bias-corrected sample excess kurtosis (same definition as pandas)."""
+        n = self.n
+        if n < 4:
+            return np.full(len(self.columns), np.nan)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            g2 = (self.m4 / n) / (self.m2 / n) ** 2 - 3
+        return ((n + 1) * g2 + 6) * (n - 1) / ((n - 2) * (n - 3))
+
+    def cov(self, ddof=1):
+        return pd.DataFrame(self.comoment / (self.n - ddof),
+                            index=self.columns, columns=self.columns)
+
+    def corr(self):
+        scale = np.sqrt(np.diag(self.comoment))
+        with np.errstate(divide='ignore', invalid='ignore'):
+            corr = self.comoment / np.outer(scale, scale)
+        np.fill_diagonal(corr, 1.0)
+        corr = np.clip(corr, -1.0, 1.0)
+        return pd.DataFrame(corr, index=self.columns, columns=self.columns)
+
+    def describe(self, quantiles=None):
+        """Statistics laid out like DataFrame.describe() plus skew and kurtosis.
+
+        Quantiles are not mergeable; pass {0.25: array, ...} computed from the
+        data if they are needed, otherwise the quantile rows are NaN.
+        """
+        quantiles = quantiles or {}
+        rows = {
+            'count': np.full(len(self.columns), float(self.n)),
+            'mean': self.mean,
+            'std': self.std(),
+            'min': self.min,
+        }
+        for q in (0.25, 0.5, 0.75):
+            rows[f"{q:.0%}"] = quantiles.get(q, np.full(len(self.columns), np.nan))
+        rows['max'] = self.max
+        rows['skew'] = self.skew()
+        rows['kurtosis'] = self.kurtosis()
+        return pd.DataFrame(rows, index=self.columns).T
+
+
+def pairwise_corr(values, columns, min_periods=1):
+    """Correlation using pairwise-complete observations (like DataFrame.corr()).
+
+    Each pair is centered on the column means before the masked products so
+    the sums stay numerically stable.
+    """
+    values = np.asarray(values, dtype=float)
+    mask = ~np.isnan(values)
+    weights = mask.astype(float)
+    centered = np.where(mask, values - np.nanmean(values, axis=0), 0.0)
+
+    n = weights.T @ weights
+    sx = centered.T @ weights                      # sum of x_i where x_j is present
+    sxx = (centered * centered).T @ weights
+    sxy = centered.T @ centered
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sxy - sx * sx.T / n
+        var_x = sxx - sx * sx / n
+        corr = cov / np.sqrt(var_x * var_x.T)
+    corr[n < max(min_periods, 2)] = np.nan
+    corr = np.clip(corr, -1.0, 1.0)
+    return pd.DataFrame(corr, index=columns, columns=columns)
+
+
+def summarize_panel(df, columns, pairwise=False, chunk_rows=None):
+    """Descriptive statistics and correlation matrix from a single pass.
+
+    With chunk_rows set, moments are accumulated chunk by chunk and merged,
+    which is what a parallel caller would do with partial results.
+    """
+    values = df[columns].to_numpy(dtype=float)
+    complete = values[~np.isnan(values).any(axis=1)]
+
+    if chunk_rows:
+        moments = Moments.from_array(complete[:0], columns)
+        for start in range(0, len(complete), chunk_rows):
+            moments = moments.merge(Moments.from_array(complete[start:start + chunk_rows], columns))
+    else:
+        moments = Moments.from_array(complete, columns)
+
+    quantiles = {}
+    if len(complete):
+        for q, row in zip((0.25, 0.5, 0.75), np.quantile(complete, [0.25, 0.5, 0.75], axis=0)):
+            quantiles[q] = row
+
+    stats = moments.describe(quantiles)
+    corr = pairwise_corr(values, columns) if pairwise else moments.corr()
+    return stats, corr
+
+
+def parity_mismatch(name, ours, reference, rtol):
+    """Failure message if ours differs from reference beyond rtol, else None.
+
+    The absolute slack is rtol times the largest reference magnitude, so
+    values near zero (correlations, skew) are judged on the quantity's scale.
+    """
+    ours, reference = np.asarray(ours, dtype=float), np.asarray(reference, dtype=float)
+    if ours.shape != reference.shape:
+        return f"{name}: shape {ours.shape} != {reference.shape}"
+    finite = np.abs(reference[np.isfinite(reference)])
+    atol = rtol * finite.max() if finite.size else 0.0
+    if np.allclose(ours, reference, rtol=rtol, atol=atol, equal_nan=True):
+        return None
+    with np.errstate(invalid='ignore'):
+        worst = np.nanmax(np.abs(ours - reference))
+    return f"{name}: max abs diff {worst:.3e}"
+
+
+def check_parity(df, columns, chunk_rows=7, rtol=PARITY_RTOL):
+    """Compare summarize_panel with DataFrame.describe/skew/kurt/corr.
+
+    Checks the single-pass, chunked (merged) and pairwise paths. Returns a
+    list of failure messages; empty means every statistic matched.
+    """
+    complete = df[columns].dropna()
+    describe = complete.describe()
+    failures = []
+    for label, kwargs in [('single-pass', {}), ('chunked', {'chunk_rows': chunk_rows})]:
+        stats, corr = summarize_panel(df, columns, **kwargs)
+        failures += [
+            parity_mismatch(f"{label} describe", stats.loc[describe.index], describe, rtol),
+            parity_mismatch(f"{label} skew", stats.loc['skew'], complete.skew(), rtol),
+            parity_mismatch(f"{label} kurtosis", stats.loc['kurtosis'], complete.kurt(), rtol),
+            parity_mismatch(f"{label} corr", corr, complete.corr(), rtol),
+        ]
+    _, corr = summarize_panel(df, columns, pairwise=True)
+    failures.append(parity_mismatch('pairwise corr', corr, df[columns].corr(), rtol))
+    return [f for f in failures if f]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the moments engine against pandas')
+    parser.add_argument('--input', required=True, help='Input CSV path')
+    parser.add_argument('--columns', nargs='+', help='Columns to check (default: every numeric column)')
+    parser.add_argument('--chunk-rows', type=int, default=7, help='Chunk size for the merged path')
+    parser.add_argument('--rtol', type=float, default=PARITY_RTOL, help='Relative tolerance')
+    args = parser.parse_args()
+    setup_logging()
+    
+    df = pd.read_csv(args.input, parse_dates=['date'])
+    columns = args.columns or [c for c in df.columns
+                               if c != 'date' and pd.api.types.is_numeric_dtype(df[c])]
+    failures = check_parity(df, columns, args.chunk_rows, args.rtol)
+    
+    for failure in failures:
+        logger.error(f"   MISMATCH {failure}")
+    logger.info(f"Moments parity ({len(columns)} columns, {len(df)} rows): "
+                f"{'FAIL' if failures else 'PASS'}")
+    if failures:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
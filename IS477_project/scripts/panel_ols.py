@@ -0,0 +1,218 @@
+"""
+Batched OLS for many dependent series sharing one design matrix.
+X is factorized once (QR) per missing-value pattern of Y and every column
+is solved against it, giving coefficients, standard errors and fit
+statistics as arrays that match statsmodels OLS for each series. Run as a
+script to check that against sm.OLS on a pipeline CSV.
+"""
+
+import argparse
+import logging
+
+import numpy as np
+import pandas as pd
+from scipy import linalg, stats
+
+from utils import setup_logging
+from moments import parity_mismatch
+
+
+logger = logging.getLogger(__name__)
+
+# Relative tolerance for the statsmodels parity check
+PARITY_RTOL = 1e-8
+
+
+class BatchedOLSResults:
+    """Per-series OLS results, named like the statsmodels attributes.
+
+    nobs and df_resid are per-series, since series with missing values are
+    fit on their own samples.
+    """
+
+    def __init__(self, params, bse, ssr, resid_diff_ss, nobs, k_constant, tss):
+        self.params = params
+        self.bse = bse
+        self.nobs = nobs
+        self.df_model = params.shape[0] - k_constant
+        self.df_resid = nobs - params.shape[0]
+
+        self.ssr = ssr
+        self.tvalues = params / bse
+        self.pvalues = pd.DataFrame(2 * stats.t.sf(np.abs(self.tvalues), self.df_resid.to_numpy()),
+                                    index=params.index, columns=params.columns)
+
+        self.rsquared = 1 - self.ssr / tss
+        self.rsquared_adj = 1 - (nobs - k_constant) / self.df_resid * (1 - self.rsquared)
+        self.fvalue = ((tss - self.ssr) / self.df_model) / (self.ssr / self.df_resid)
+        self.f_pvalue = pd.Series(stats.f.sf(self.fvalue, self.df_model, self.df_resid),
+                                  index=params.columns)
+
+        # Gaussian log-likelihood at the MLE of sigma^2, as in statsmodels
+        self.llf = -nobs / 2 * (np.log(2 * np.pi) + np.log(self.ssr / nobs) + 1)
+        k = params.shape[0]
+        self.aic = -2 * self.llf + 2 * k
+        self.bic = -2 * self.llf + np.log(nobs) * k
+        self.durbin_watson = resid_diff_ss / self.ssr
+
+    def summary_frame(self):
+        """One row per dependent series with the fit statistics."""
+        return pd.DataFrame({
+            'n_observations': self.nobs,
+            'r_squared': self.rsquared,
+            'adj_r_squared': self.rsquared_adj,
+            'f_statistic': self.fvalue,
+            'f_pvalue': self.f_pvalue,
+            'aic': self.aic,
+            'bic': self.bic,
+            'durbin_watson': self.durbin_watson,
+        })
+
+    def coefficient_frame(self):
+        """Long table: one row per (series, term)."""
+        frames = {
+            'estimate': self.params, 'std_error': self.bse,
+            't_statistic': self.tvalues, 'p_value': self.pvalues,
+        }
+        long = pd.concat({name: f.stack() for name, f in frames.items()}, axis=1)
+        long.index.names = ['term', 'series']
+        return long.swaplevel().sort_index()
+
+
+def _solve(x, y, columns):
+    """QR least squares of every column of y on x.
+
+    Returns coefficients, standard errors, residuals and the row count.
+    Raises ValueError if x is rank deficient, where statsmodels would fall
+    back to a pseudo-inverse.
+    """
+    nobs, k = x.shape
+    if nobs <= k:
+        raise ValueError(f"Only {nobs} complete rows for {k} regressors (series: {', '.join(columns)})")
+    q, r = linalg.qr(x, mode='economic')
+    diag = np.abs(np.diag(r))
+    if diag.min() <= diag.max() * max(x.shape) * np.finfo(float).eps:
+        raise ValueError(f"Design matrix is rank deficient (collinear regressors) on the "
+                         f"sample of series: {', '.join(columns)}")
+    beta = linalg.solve_triangular(r, q.T @ y)
+    resid = y - x @ beta
+
+    # diag((X'X)^-1) from R^-1, shared by every series
+    r_inv = linalg.solve_triangular(r, np.eye(k))
+    xtx_inv_diag = (r_inv ** 2).sum(axis=1)
+    sigma2 = (resid ** 2).sum(axis=0) / (nobs - k)
+    return beta, np.sqrt(np.outer(xtx_inv_diag, sigma2)), resid, nobs
+
+
+def batched_ols(X, Y, add_constant=True):
+    """Regress every column of Y on X, one QR factorization per sample.
+
+    X and Y are DataFrames on the same index. Rows with a missing value in X
+    are dropped for every series; each series then uses its own non-missing
+    rows, as a separate sm.OLS fit would. Series sharing a missing-value
+    pattern (all of them, for a balanced panel) share one factorization.
+    """
+    X = X.to_frame() if isinstance(X, pd.Series) else X
+    Y = Y.to_frame() if isinstance(Y, pd.Series) else Y
+    if add_constant:
+        X = pd.concat([pd.Series(1.0, index=X.index, name='const'), X], axis=1)
+    k_constant = int('const' in X.columns)
+
+    complete_x = X.notna().all(axis=1).to_numpy()
+    x = X[complete_x].to_numpy(dtype=float)
+    y = Y[complete_x].to_numpy(dtype=float)
+    present = ~np.isnan(y)
+
+    k, m = x.shape[1], y.shape[1]
+    beta, bse = np.empty((k, m)), np.empty((k, m))
+    ssr, resid_diff_ss, tss = np.empty(m), np.empty(m), np.empty(m)
+    nobs = np.empty(m, dtype=np.int64)
+
+    # Group series by their missing-value pattern
+    patterns, group = np.unique(present.T, axis=0, return_inverse=True)
+    for g, rows in enumerate(patterns):
+        cols = np.flatnonzero(group.ravel() == g)
+        y_g = y[np.ix_(rows, cols)]
+        beta[:, cols], bse[:, cols], resid, nobs[cols] = _solve(x[rows], y_g, Y.columns[cols])
+        ssr[cols] = (resid ** 2).sum(axis=0)
+        resid_diff_ss[cols] = (np.diff(resid, axis=0) ** 2).sum(axis=0)
+        centered = y_g - y_g.mean(axis=0) if k_constant else y_g
+        tss[cols] = (centered ** 2).sum(axis=0)
+
+    params = pd.DataFrame(beta, index=X.columns, columns=Y.columns)
+    bse = pd.DataFrame(bse, index=X.columns, columns=Y.columns)
+    ssr, resid_diff_ss, nobs, tss = (pd.Series(values, index=Y.columns)
+                                     for values in (ssr, resid_diff_ss, nobs, tss))
+    return BatchedOLSResults(params, bse, ssr, resid_diff_ss, nobs, k_constant, tss)
+
+
+def check_parity(X, Y, rtol=PARITY_RTOL):
+    """Compare batched_ols with sm.OLS fitted one series at a time.
+
+    Checks coefficients, standard errors, t/p-values and the fit statistics,
+    with and without a constant. Returns a list of failure messages; empty
+    means every series matched.
+    """
+    # statsmodels is only needed for the check
+    import statsmodels.api as sm
+    from statsmodels.stats.stattools import durbin_watson
+    
+    X = X.to_frame() if isinstance(X, pd.Series) else X
+    Y = Y.to_frame() if isinstance(Y, pd.Series) else Y
+    failures = []
+    for add_constant in (True, False):
+        batched = batched_ols(X, Y, add_constant=add_constant)
+        design = sm.add_constant(X, has_constant='add') if add_constant else X
+        label = 'with constant' if add_constant else 'no constant'
+        for series in batched.params.columns:
+            sample = design.notna().all(axis=1) & Y[series].notna()
+            fit = sm.OLS(Y.loc[sample, series], design[sample]).fit()
+            pairs = {
+                'params': (batched.params[series], fit.params),
+                'bse': (batched.bse[series], fit.bse),
+                'tvalues': (batched.tvalues[series], fit.tvalues),
+                'pvalues': (batched.pvalues[series], fit.pvalues),
+                'nobs': (batched.nobs[series], fit.nobs),
+                'ssr': (batched.ssr[series], fit.ssr),
+                'rsquared': (batched.rsquared[series], fit.rsquared),
+                'rsquared_adj': (batched.rsquared_adj[series], fit.rsquared_adj),
+                'fvalue': (batched.fvalue[series], fit.fvalue),
+                'f_pvalue': (batched.f_pvalue[series], fit.f_pvalue),
+                'aic': (batched.aic[series], fit.aic),
+                'bic': (batched.bic[series], fit.bic),
+                'durbin_watson': (batched.durbin_watson[series], durbin_watson(fit.resid)),
+            }
+            # An exact fit leaves rounding-noise residuals, so only its coefficients compare
+            if fit.ssr <= rtol * fit.centered_tss:
+                pairs = {name: pairs[name] for name in ('params', 'nobs', 'rsquared')}
+            failures += [parity_mismatch(f"{series} ({label}) {name}", ours, reference, rtol)
+                         for name, (ours, reference) in pairs.items()]
+    return [f for f in failures if f]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check batched OLS against statsmodels OLS')
+    parser.add_argument('--input', required=True, help='Input CSV path')
+    parser.add_argument('--exog', nargs='+', default=['cpi_yoy_pct'], help='Regressor columns')
+    parser.add_argument('--dependents', nargs='+',
+                        help='Dependent columns (default: every other numeric column)')
+    parser.add_argument('--rtol', type=float, default=PARITY_RTOL, help='Relative tolerance')
+    args = parser.parse_args()
+    setup_logging()
+    
+    df = pd.read_csv(args.input, parse_dates=['date'])
+    dependents = args.dependents or [c for c in df.columns
+                                     if c != 'date' and c not in args.exog
+                                     and pd.api.types.is_numeric_dtype(df[c])]
+    failures = check_parity(df[args.exog], df[dependents], args.rtol)
+    
+    for failure in failures:
+        logger.error(f"   MISMATCH {failure}")
+    logger.info(f"Batched OLS parity ({len(dependents)} series on {', '.join(args.exog)}): "
+                f"{'FAIL' if failures else 'PASS'}")
+    if failures:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
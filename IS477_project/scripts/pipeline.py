@@ -0,0 +1,133 @@
+"""
+Library API for running the pipeline in-process.
+Each stage takes and returns in-memory objects, so callers need no argv,
+subprocesses or CSV round-trips. Progress is reported through the logging
+module (configure it yourself, or call utils.setup_logging()).
+
+    import asyncio
+    import pipeline
+
+    config = pipeline.load('config.yaml')
+    frames = await pipeline.acquire_async(config)   # or pipeline.acquire(config)
+    panel = pipeline.integrate(frames, config)
+    report = pipeline.quality(panel)
+    fits = pipeline.fit(panel, 'all', config)
+"""
+
+import asyncio
+import logging
+from pathlib import Path
+
+from utils import create_session, load_config
+from acquire_cpi import acquire_cpi, load_api_key
+from acquire_pce import acquire_pce
+from integrate import merge_series, enrich_data
+from quality_check import run_quality_checks
+from modeling import (prepare_model_data, run_baseline_model, run_lagged_model,
+                      run_arimax_model, fit_models, DEFAULT_ARIMAX_ORDER)
+
+
+logger = logging.getLogger(__name__)
+
+# Series that acquire() knows how to fetch
+SERIES = ('cpi', 'pce')
+
+# Model specifications accepted by fit()
+SPECS = ('baseline', 'lagged', 'arimax', 'all')
+
+
+def load(config):
+    """Return a config dict, loading it from YAML if given a path."""
+    if isinstance(config, (str, Path)):
+        return load_config(config)
+    return config
+
+
+def _acquire_one(config, series_id, session=None, api_key=None):
+    if series_id == 'cpi':
+        return acquire_cpi(config, api_key or load_api_key(config['fred_api_key_file']), session=session)
+    if series_id == 'pce':
+        return acquire_pce(config, session=session)
+    raise ValueError(f"Unknown series {series_id!r}; expected one of {SERIES}")
+
+
+def acquire(config, series_ids=SERIES, session=None, api_key=None):
+    """Download the raw series. Returns {series_id: DataFrame}.
+
+    Reuses session (see utils.create_session) for every request if given.
+    """
+    config = load(config)
+    session = session or create_session()
+    return {sid: _acquire_one(config, sid, session, api_key) for sid in series_ids}
+
+
+async def acquire_async(config, series_ids=SERIES, api_key=None):
+    """Async acquire(): series download concurrently in worker threads.
+
+    Each download gets its own session, since requests sessions are not
+    safe to share between threads.
+    """
+    config = load(config)
+    frames = await asyncio.gather(*[
+        asyncio.to_thread(_acquire_one, config, sid, create_session(), api_key)
+        for sid in series_ids
+    ])
+    return dict(zip(series_ids, frames))
+
+
+def integrate(frames, config):
+    """Merge the acquired CPI and PCE frames and add the derived variables."""
+    config = load(config)
+    merged = merge_series(frames['cpi'], frames['pce'])
+    # In-process callers keep results in memory; skip the on-disk stage cache
+    return enrich_data.__wrapped__(merged, config['cpi_base_date'])
+
+
+def quality(frame, frequency=None):
+    """Run the data quality checks; returns the report dict."""
+    return run_quality_checks(frame, frequency)
+
+
+def fit(frame, spec='all', config=None, warm_start=(), panel_dependents=None):
+    """Fit a model specification to the integrated panel.
+
+    spec is 'baseline' or 'lagged' (statsmodels OLS results), 'arimax'
+    (SARIMAX results) or 'all' (the dict from modeling.fit_models, with the
+    results table and the model_results.json contents). warm_start is a
+    list of model_results paths or dicts to start ARIMAX from.
+    """
+    if spec not in SPECS:
+        raise ValueError(f"Unknown spec {spec!r}; expected one of {SPECS}")
+    order = DEFAULT_ARIMAX_ORDER
+    if config:
+        order = load(config)['analysis'].get('arimax_order', order)
+    model_df = prepare_model_data.__wrapped__(frame)
+    if spec == 'baseline':
+        return run_baseline_model(model_df)
+    if spec == 'lagged':
+        return run_lagged_model(model_df)
+    if spec == 'arimax':
+        return run_arimax_model(model_df, order, warm_start_paths=warm_start)
+    return fit_models(model_df, order, warm_start=warm_start, panel_dependents=panel_dependents)
+
+
+def run(config, series_ids=SERIES):
+    """Run every stage in-process. Returns frames, panel, quality and fits."""
+    config = load(config)
+    frames = acquire(config, series_ids)
+    panel = integrate(frames, config)
+    return {'frames': frames, 'panel': panel, 'quality': quality(panel),
+            'fits': fit(panel, 'all', config)}
+
+
+async def run_async(config, series_ids=SERIES):
+    """Async run(): downloads run concurrently, and the CPU-bound stages run in
+    a worker thread so the caller's event loop stays responsive."""
+    config = load(config)
+    frames = await acquire_async(config, series_ids)
+    panel = await asyncio.to_thread(integrate, frames, config)
+    report, fits = await asyncio.gather(
+        asyncio.to_thread(quality, panel),
+        asyncio.to_thread(fit, panel, 'all', config),
+    )
+    return {'frames': frames, 'panel': panel, 'quality': report, 'fits': fits}
@@ -5,12 +5,19 @@ Checks for missing values, duplicates, and temporal coverage.
 
 import argparse
 import json
+import logging
 from pathlib import Path
 
 import pandas as pd
 
+from utils import atomic_write_text, stage_is_complete, mark_stage_complete, setup_logging
+from coverage import check_coverage, UNKNOWN_FREQUENCY
 
-def run_quality_checks(df):
+
+logger = logging.getLogger(__name__)
+
+
+def run_quality_checks(df, frequency=None):
     """Run comprehensive quality checks on the dataset."""
     
     results = {
@@ -20,13 +27,8 @@ def run_quality_checks(df):
         'errors': []
     }
     
-    print("=" * 60)
-    print("DATA QUALITY ASSESSMENT")
-    print("=" * 60)
-    
     # 1. Missing Values Check
-    print("\n1. Missing Values Check")
-    print("-" * 40)
+    logger.info("1. Missing Values Check")
     missing = df.isna().sum()
     missing_info = {}
     
@@ -34,31 +36,29 @@ def run_quality_checks(df):
         if count > 0:
             missing_info[col] = int(count)
             if '_yoy_' in col:
-                print(f"   {col}: {count} missing (OK - first 12 months)")
+                logger.info(f"   {col}: {count} missing (OK - first 12 months)")
             else:
-                print(f"   {col}: {count} missing (WARNING)")
+                logger.warning(f"   {col}: {count} missing (WARNING)")
                 results['warnings'].append(f"{col} has {count} missing values")
         else:
-            print(f"   {col}: OK (no missing)")
+            logger.info(f"   {col}: OK (no missing)")
     
     results['checks']['missing_values'] = missing_info
     
     # 2. Duplicate Dates Check
-    print("\n2. Duplicate Dates Check")
-    print("-" * 40)
+    logger.info("2. Duplicate Dates Check")
     duplicates = df.duplicated('date').sum()
     results['checks']['duplicate_dates'] = int(duplicates)
     
     if duplicates == 0:
-        print(f"   OK: No duplicate dates found")
+        logger.info(f"   OK: No duplicate dates found")
     else:
-        print(f"   ERROR: {duplicates} duplicate dates found")
+        logger.error(f"   ERROR: {duplicates} duplicate dates found")
         results['errors'].append(f"{duplicates} duplicate dates")
         results['status'] = 'FAIL'
     
     # 3. Temporal Coverage Check
-    print("\n3. Temporal Coverage Check")
-    print("-" * 40)
+    logger.info("3. Temporal Coverage Check")
     date_range = {
         'start': str(df['date'].min().date()),
         'end': str(df['date'].max().date()),
@@ -66,25 +66,51 @@ def run_quality_checks(df):
     }
     results['checks']['date_range'] = date_range
     
-    print(f"   Start: {date_range['start']}")
-    print(f"   End: {date_range['end']}")
-    print(f"   Total observations: {date_range['total_months']}")
-    
-    # Check for gaps
-    df_sorted = df.sort_values('date')
-    date_diffs = df_sorted['date'].diff().dropna()
-    expected_diff = pd.Timedelta(days=28)  # Approximately 1 month
-    max_diff = date_diffs.max()
-    
-    if max_diff > pd.Timedelta(days=35):
-        results['warnings'].append(f"Potential gap detected: max interval is {max_diff.days} days")
-        print(f"   WARNING: Max interval between dates is {max_diff.days} days")
-    else:
-        print(f"   OK: No gaps detected (max interval: {max_diff.days} days)")
+    logger.info(f"   Start: {date_range['start']}")
+    logger.info(f"   End: {date_range['end']}")
+    logger.info(f"   Total observations: {date_range['total_months']}")
+    
+    # Check for gaps: every series against its expected calendar periods
+    value_cols = [c for c in df.columns if c != 'date' and pd.api.types.is_numeric_dtype(df[c])]
+    frequencies = {col: frequency for col in value_cols} if frequency else None
+    summary, missing = check_coverage(df, value_cols=value_cols, frequencies=frequencies)
+    
+    missing_by_series = missing.groupby('series')['period'].agg(list).to_dict()
+    coverage = {}
+    for row in summary.itertuples():
+        if row.frequency == UNKNOWN_FREQUENCY:
+            coverage[row.series] = {
+                'frequency': row.frequency,
+                'start': row.start,
+                'end': row.end,
+                'observed_periods': int(row.observed_periods),
+                'error': row.error,
+            }
+            results['warnings'].append(f"{row.series}: coverage not checked ({row.error})")
+            logger.warning(f"   WARNING: {row.series} coverage not checked ({row.error})")
+            continue
+        periods = missing_by_series.get(row.series, [])
+        coverage[row.series] = {
+            'frequency': row.frequency,
+            'start': row.start,
+            'end': row.end,
+            'expected_periods': int(row.expected_periods),
+            'observed_periods': int(row.observed_periods),
+            'missing_periods': periods,
+        }
+        if periods:
+            results['warnings'].append(f"{row.series} is missing {len(periods)} periods: {', '.join(periods[:10])}"
+                                       + (" ..." if len(periods) > 10 else ""))
+            logger.warning(f"   WARNING: {row.series} ({row.frequency}) missing {len(periods)} periods")
+    results['checks']['coverage'] = coverage
+    
+    checked = summary[summary['frequency'] != UNKNOWN_FREQUENCY] if len(summary) else summary
+    if missing.empty and len(checked):
+        freqs = ', '.join(sorted(checked['frequency'].unique()))
+        logger.info(f"   OK: No gaps detected ({len(checked)} series, frequency: {freqs})")
     
     # 4. Value Range Check
-    print("\n4. Value Range Check")
-    print("-" * 40)
+    logger.info("4. Value Range Check")
     
     range_checks = {
         'cpi': {'min': 100, 'max': 500},
@@ -97,20 +123,11 @@ def run_quality_checks(df):
             col_max = df[col].max()
             
             if col_min >= bounds['min'] and col_max <= bounds['max']:
-                print(f"   {col}: OK (range: {col_min:.2f} - {col_max:.2f})")
+                logger.info(f"   {col}: OK (range: {col_min:.2f} - {col_max:.2f})")
             else:
-                print(f"   {col}: WARNING (range: {col_min:.2f} - {col_max:.2f})")
+                logger.warning(f"   {col}: WARNING (range: {col_min:.2f} - {col_max:.2f})")
                 results['warnings'].append(f"{col} has unexpected range")
     
-    # 5. Summary
-    print("\n" + "=" * 60)
-    print(f"OVERALL STATUS: {results['status']}")
-    if results['warnings']:
-        print(f"Warnings: {len(results['warnings'])}")
-    if results['errors']:
-        print(f"Errors: {len(results['errors'])}")
-    print("=" * 60)
-    
     return results
 
 
@@ -118,24 +135,49 @@ def main():
     parser = argparse.ArgumentParser(description='Run data quality checks')
     parser.add_argument('--input', required=True, help='Input CSV path')
     parser.add_argument('--output', required=True, help='Output JSON report path')
+    parser.add_argument('--frequency', help='Expected frequency for all series (D/B/W/M/Q/Y); inferred if omitted')
     args = parser.parse_args()
+    setup_logging()
+    
+    # Resume: skip if this input already passed
+    inputs = [args.input]
+    outputs = [args.output]
+    if stage_is_complete('quality_check', inputs, outputs, params=vars(args)):
+        logger.info("quality_check: outputs up to date, skipping (set PIPELINE_FORCE=1 to rerun)",
+                    extra={'stage': 'quality_check', 'skipped': True})
+        return
     
     # Load data
-    print(f"Loading data from: {args.input}")
+    logger.info(f"Loading data from: {args.input}")
     df = pd.read_csv(args.input, parse_dates=['date'])
     
     # Run quality checks
-    results = run_quality_checks(df)
+    logger.info("=" * 60)
+    logger.info("DATA QUALITY ASSESSMENT")
+    logger.info("=" * 60)
+    results = run_quality_checks(df, args.frequency)
+    
+    # Summary
+    logger.info("\n" + "=" * 60)
+    logger.info(f"OVERALL STATUS: {results['status']}")
+    if results['warnings']:
+        logger.info(f"Warnings: {len(results['warnings'])}")
+    if results['errors']:
+        logger.info(f"Errors: {len(results['errors'])}")
+    logger.info("=" * 60)
     
     # Save report
     output_path = Path(args.output)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    output_path.write_text(json.dumps(results, indent=2))
-    print(f"\nQuality report saved: {output_path}")
+    atomic_write_text(output_path, json.dumps(results, indent=2))
+    logger.info(f"\nQuality report saved: {output_path}",
+                extra={'stage': 'quality_check', 'output': str(output_path), 'status': results['status']})
     
     # Exit with error code if checks failed
     if results['status'] == 'FAIL':
         exit(1)
+    
+    mark_stage_complete('quality_check', inputs, outputs, params=vars(args))
 
 
 if __name__ == '__main__':
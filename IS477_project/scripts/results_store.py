@@ -0,0 +1,222 @@
+"""
+Columnar storage and query API for model results.
+Every fit is stored as one row per coefficient with typed columns in a
+Parquet file (requires pyarrow); model_results.json is derived from it.
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from scipy import stats
+
+from utils import atomic_path, write_csv, setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# Column order and dtypes of the results table
+RESULT_SCHEMA = {
+    'series': 'string',
+    'spec': 'string',
+    'model': 'string',
+    'window': 'string',
+    'term': 'string',
+    'estimate': 'float64',
+    'std_error': 'float64',
+    'statistic': 'float64',
+    'p_value': 'float64',
+    'ci_lower': 'float64',
+    'ci_upper': 'float64',
+    'n_observations': 'int64',
+    'r_squared': 'float64',
+    'adj_r_squared': 'float64',
+    'f_statistic': 'float64',
+    'f_pvalue': 'float64',
+    'aic': 'float64',
+    'bic': 'float64',
+    'log_likelihood': 'float64',
+    'durbin_watson': 'float64',
+}
+
+# Name of the test statistic in the JSON view, by model type
+STATISTIC_NAMES = {'ols': 't_statistic', 'arimax': 'z_statistic'}
+
+
+def _typed(table):
+    for col in RESULT_SCHEMA:
+        if col not in table.columns:
+            table[col] = np.nan
+    return table[list(RESULT_SCHEMA)].astype(RESULT_SCHEMA)
+
+
+def ols_fit_table(model, series, spec, window):
+    """Rows for a fitted statsmodels OLS model."""
+    conf_int = model.conf_int()
+    table = pd.DataFrame({
+        'term': model.params.index,
+        'estimate': model.params.to_numpy(),
+        'std_error': model.bse.to_numpy(),
+        'statistic': model.tvalues.to_numpy(),
+        'p_value': model.pvalues.to_numpy(),
+        'ci_lower': conf_int[0].to_numpy(),
+        'ci_upper': conf_int[1].to_numpy(),
+    })
+    table = table.assign(
+        series=series, spec=spec, model='ols', window=window,
+        n_observations=int(model.nobs),
+        r_squared=model.rsquared,
+        adj_r_squared=model.rsquared_adj,
+        f_statistic=model.fvalue,
+        f_pvalue=model.f_pvalue,
+        aic=model.aic,
+        bic=model.bic,
+        log_likelihood=model.llf,
+        durbin_watson=(np.diff(model.resid) ** 2).sum() / (model.resid ** 2).sum(),
+    )
+    return _typed(table)
+
+
+def arimax_fit_table(fit, series, spec, window):
+    """Rows for a fitted statsmodels SARIMAX model."""
+    conf_int = fit.conf_int()
+    table = pd.DataFrame({
+        'term': fit.params.index,
+        'estimate': fit.params.to_numpy(),
+        'std_error': fit.bse.to_numpy(),
+        'statistic': fit.zvalues.to_numpy(),
+        'p_value': fit.pvalues.to_numpy(),
+        'ci_lower': conf_int[0].to_numpy(),
+        'ci_upper': conf_int[1].to_numpy(),
+    })
+    table = table.assign(
+        series=series, spec=spec, model='arimax', window=window,
+        n_observations=int(fit.nobs),
+        aic=fit.aic,
+        bic=fit.bic,
+        log_likelihood=fit.llf,
+    )
+    return _typed(table)
+
+
+def panel_fit_table(results, spec, window, alpha=0.05):
+    """Rows for a BatchedOLSResults: every (series, term) in one vectorized frame."""
+    coefs = results.coefficient_frame().reset_index()
+    margin = stats.t.ppf(1 - alpha / 2, coefs['series'].map(results.df_resid)) * coefs['std_error']
+    coefs = coefs.rename(columns={'t_statistic': 'statistic'})
+    coefs['ci_lower'] = coefs['estimate'] - margin
+    coefs['ci_upper'] = coefs['estimate'] + margin
+
+    fits = results.summary_frame()
+    fits['log_likelihood'] = results.llf
+    table = coefs.merge(fits, left_on='series', right_index=True)
+    table = table.assign(spec=spec, model='ols', window=window)
+    return _typed(table)
+
+
+def results_table(tables):
+    """Combine per-fit tables into one typed results table."""
+    return _typed(pd.concat(tables, ignore_index=True) if isinstance(tables, list) else tables)
+
+
+def write_results(table, path):
+    """Write the results table to Parquet (crash-safe)."""
+    table = results_table(table)
+    with atomic_path(path) as tmp_path:
+        table.to_parquet(tmp_path, index=False)
+    return table
+
+
+def query_results(path, series=None, spec=None, window=None, term=None, columns=None):
+    """Load fits from the results table, filtered by series/spec/window/term.
+
+    Each filter takes a single value or a list. Filters are pushed down to
+    the Parquet reader so only matching row groups are read.
+    """
+    filters = []
+    for name, value in [('series', series), ('spec', spec), ('window', window), ('term', term)]:
+        if value is None:
+            continue
+        values = [value] if isinstance(value, str) else list(value)
+        filters.append((name, 'in', values))
+    return pd.read_parquet(path, columns=columns, filters=filters or None)
+
+
+def summary_from_table(table, spec, series='real_pce'):
+    """Build the model_results.json entry for one fit from its table rows."""
+    rows = table[(table['spec'] == spec) & (table['series'] == series)]
+    if rows.empty:
+        raise KeyError(f"No results for spec={spec!r}, series={series!r}")
+    first = rows.iloc[0]
+    statistic_name = STATISTIC_NAMES[first['model']]
+
+    def value(col):
+        v = first[col]
+        return None if pd.isna(v) else v.item() if hasattr(v, 'item') else v
+
+    summary = {
+        'model_name': spec,
+        'dependent_variable': series,
+        'n_observations': int(first['n_observations']),
+    }
+    if first['model'] == 'ols':
+        summary.update({
+            'r_squared': value('r_squared'),
+            'adj_r_squared': value('adj_r_squared'),
+            'f_statistic': value('f_statistic'),
+            'f_pvalue': value('f_pvalue'),
+            'aic': value('aic'),
+            'bic': value('bic'),
+            'durbin_watson': value('durbin_watson'),
+        })
+    else:
+        summary.update({
+            'log_likelihood': value('log_likelihood'),
+            'aic': value('aic'),
+            'bic': value('bic'),
+        })
+
+    summary['coefficients'] = {
+        row.term: {
+            'estimate': float(row.estimate),
+            'std_error': float(row.std_error),
+            statistic_name: float(row.statistic),
+            'p_value': float(row.p_value),
+            'ci_lower': float(row.ci_lower),
+            'ci_upper': float(row.ci_upper),
+        }
+        for row in rows.itertuples()
+    }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the columnar model results table')
+    parser.add_argument('--input', default='results/model_results.parquet', help='Results Parquet path')
+    parser.add_argument('--series', nargs='+', help='Dependent series to keep')
+    parser.add_argument('--spec', nargs='+', help='Model specifications to keep')
+    parser.add_argument('--window', nargs='+', help='Sample windows to keep (start/end)')
+    parser.add_argument('--term', nargs='+', help='Coefficient terms to keep')
+    parser.add_argument('--output', help='Optional CSV path for the filtered rows')
+    args = parser.parse_args()
+    setup_logging()
+
+    table = query_results(args.input, series=args.series, spec=args.spec,
+                          window=args.window, term=args.term)
+    logger.info(f"{len(table)} rows matched")
+    # Query output is the CLI's data, so it goes to stdout rather than the log
+    sys.stdout.write(table.to_string(index=False) + "\n")
+
+    if args.output:
+        output_path = Path(args.output)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        write_csv(table, output_path)
+        logger.info(f"Saved: {output_path}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,267 @@
+"""
+Resident pipeline service.
+Keeps config, the HTTP session, the loaded series and fitted models in
+memory, refreshes on a schedule (or on POST /refresh), reruns only the
+stages whose inputs changed, and serves the latest results over HTTP on
+localhost straight from memory.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from utils import create_session, load_config, hash_frame, sha256_checksum, setup_logging
+from acquire_cpi import acquire_cpi, load_api_key
+from acquire_pce import acquire_pce
+from integrate import merge_series, enrich_data
+from quality_check import run_quality_checks
+from modeling import prepare_model_data, fit_models, DEFAULT_ARIMAX_ORDER
+
+
+logger = logging.getLogger(__name__)
+
+
+# Stage -> the stages whose outputs it reads
+STAGE_INPUTS = {
+    'integrate': ['acquire_cpi', 'acquire_pce'],
+    'quality_check': ['integrate'],
+    'modeling': ['integrate'],
+}
+
+
+class PipelineService:
+    """In-memory pipeline state and the incremental refresh logic.
+
+    Each stage's inputs are fingerprinted (hash_frame for frames, the config
+    file checksum for settings); a stage reruns only when its fingerprint
+    differs from the one its current output was built from.
+    """
+
+    def __init__(self, config_path, cpi_file=None, pce_file=None, panel_dependents=None):
+        self.config_path = Path(config_path)
+        self.cpi_file = cpi_file
+        self.pce_file = pce_file
+        self.panel_dependents = panel_dependents
+        self.session = create_session()
+
+        self.config = None
+        self.config_hash = None
+        self.api_key = None
+        self.frames = {}
+        self.fits = None
+        self.quality = None
+        self.fingerprints = {}
+        self.built_from = {}
+
+        # Rendered responses, swapped in as one dict so readers never see a mix
+        self.snapshot = {}
+        self.status = {'state': 'starting', 'last_refresh': None, 'last_error': None,
+                       'refresh_count': 0, 'stages_run': []}
+        self._lock = threading.Lock()
+
+    def _reload_config(self):
+        """Reload the config only when the file changed."""
+        config_hash = sha256_checksum(self.config_path)
+        if config_hash != self.config_hash:
+            logger.info(f"Loading config: {self.config_path}")
+            self.config = load_config(self.config_path)
+            self.config_hash = config_hash
+            self.api_key = None if self.cpi_file else load_api_key(self.config['fred_api_key_file'])
+
+    def _acquire(self):
+        """Fetch (or reread) the raw series with the warm session."""
+        if self.cpi_file:
+            cpi = pd.read_csv(self.cpi_file, parse_dates=['date'])
+        else:
+            cpi = acquire_cpi(self.config, self.api_key, session=self.session)
+        if self.pce_file:
+            pce = pd.read_csv(self.pce_file, parse_dates=['date'])
+        else:
+            pce = acquire_pce(self.config, session=self.session)
+        for stage, df in [('acquire_cpi', cpi), ('acquire_pce', pce)]:
+            fingerprint = hash_frame(df)
+            if fingerprint != self.fingerprints.get(stage):
+                self.frames[stage] = df
+                self.fingerprints[stage] = fingerprint
+
+    def _needs_run(self, stage, force):
+        """Fingerprint of the stage's inputs, or None if its output is current."""
+        key = (self.config_hash,) + tuple(self.fingerprints.get(s) for s in STAGE_INPUTS[stage])
+        if not force and self.built_from.get(stage) == key:
+            return None
+        return key
+
+    def refresh(self, force=False):
+        """Run one refresh cycle; returns the names of the stages that ran."""
+        started = time.perf_counter()
+        self._reload_config()
+        self._acquire()
+        stages_run = []
+
+        key = self._needs_run('integrate', force)
+        if key:
+            merged = merge_series(self.frames['acquire_cpi'], self.frames['acquire_pce'])
+            # Results stay warm in memory, so bypass the on-disk stage cache
+            panel = enrich_data.__wrapped__(merged, self.config['cpi_base_date'])
+            self.frames['integrate'] = panel
+            self.fingerprints['integrate'] = hash_frame(panel)
+            self.built_from['integrate'] = key
+            stages_run.append('integrate')
+
+        key = self._needs_run('quality_check', force)
+        if key:
+            self.quality = run_quality_checks(self.frames['integrate'])
+            self.built_from['quality_check'] = key
+            stages_run.append('quality_check')
+
+        key = self._needs_run('modeling', force)
+        if key:
+            # Refits warm-start the ARIMAX optimizer from the previous fit in memory
+            previous = [self.fits['results']] if self.fits else []
+            model_df = prepare_model_data.__wrapped__(self.frames['integrate'])
+            self.fits = fit_models(model_df, self.config['analysis'].get('arimax_order', DEFAULT_ARIMAX_ORDER),
+                                   warm_start=previous, panel_dependents=self.panel_dependents)
+            self.built_from['modeling'] = key
+            stages_run.append('modeling')
+
+        if stages_run:
+            self._publish()
+        with self._lock:
+            self.status.update({
+                'state': 'ok',
+                'last_refresh': datetime.now(timezone.utc).isoformat(),
+                'last_error': None,
+                'refresh_count': self.status['refresh_count'] + 1,
+                'stages_run': stages_run,
+                'refresh_seconds': round(time.perf_counter() - started, 3),
+            })
+        logger.info(f"Refresh complete: {', '.join(stages_run) or 'no changes'}",
+                    extra={'stages_run': stages_run})
+        return stages_run
+
+    def _publish(self):
+        """Render the responses once per refresh rather than once per request."""
+        panel = self.frames['integrate']
+        snapshot = {
+            '/panel': ('text/csv', panel.to_csv(index=False).encode()),
+            '/panel.json': ('application/json',
+                            panel.to_json(orient='records', date_format='iso').encode()),
+            '/model_results': ('application/json', json.dumps(self.fits['results'], indent=2).encode()),
+            '/quality': ('application/json', json.dumps(self.quality, indent=2).encode()),
+        }
+        with self._lock:
+            self.snapshot = snapshot
+
+    def response(self, path):
+        """(content type, body) for a GET path, or None if unknown."""
+        if path == '/health':
+            with self._lock:
+                status = dict(self.status, panel_rows=len(self.frames.get('integrate', ())))
+            return 'application/json', json.dumps(status, indent=2).encode()
+        with self._lock:
+            return self.snapshot.get(path)
+
+    def record_error(self, error):
+        with self._lock:
+            self.status.update({'state': 'error' if not self.snapshot else 'stale',
+                                'last_error': f"{type(error).__name__}: {error}"})
+
+
+def run_scheduler(service, interval, trigger, stop):
+    """Refresh every interval seconds, or early when trigger is set."""
+    while not stop.is_set():
+        # Clear before running so a trigger arriving mid-refresh is not lost
+        force, trigger.force = trigger.force, False
+        trigger.clear()
+        try:
+            service.refresh(force=force)
+        except Exception as e:
+            # Keep serving the last good results; report the failure on /health
+            logger.exception(f"Refresh failed: {e}")
+            service.record_error(e)
+        trigger.wait(interval)
+
+
+def make_handler(service, trigger):
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urlparse(self.path)
+            path = url.path.rstrip('/') or '/'
+            if path == '/panel' and parse_qs(url.query).get('format') == ['json']:
+                path = '/panel.json'
+            found = service.response(path)
+            if found is None:
+                self._send(404, 'application/json', json.dumps({'error': f"unknown path {url.path}"}).encode())
+            else:
+                self._send(200, *found)
+
+        def do_POST(self):
+            url = urlparse(self.path)
+            if url.path.rstrip('/') != '/refresh':
+                self._send(404, 'application/json', json.dumps({'error': f"unknown path {url.path}"}).encode())
+                return
+            trigger.force = parse_qs(url.query).get('force') == ['1']
+            trigger.set()
+            self._send(202, 'application/json', json.dumps({'status': 'refresh scheduled'}).encode())
+
+        def _send(self, code, content_type, body):
+            self.send_response(code)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            logger.info(f"{self.address_string()} - {format % args}")
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the pipeline as a resident service')
+    parser.add_argument('--config', default='config.yaml', help='Path to config file')
+    parser.add_argument('--host', help='Address to bind (default from config, localhost)')
+    parser.add_argument('--port', type=int, help='Port to listen on (default from config)')
+    parser.add_argument('--interval', type=float, help='Seconds between scheduled refreshes')
+    parser.add_argument('--cpi-file', help='Read CPI from this CSV instead of the FRED API')
+    parser.add_argument('--pce-file', help='Read PCE from this CSV instead of FRED')
+    parser.add_argument('--panel-dependents', nargs='+',
+                        help='Also fit baseline/lagged specs for these columns with batched OLS')
+    args = parser.parse_args()
+    setup_logging()
+
+    service = PipelineService(args.config, args.cpi_file, args.pce_file, args.panel_dependents)
+    settings = load_config(args.config).get('service', {})
+    host = args.host or settings.get('host', '127.0.0.1')
+    port = args.port or settings.get('port', 8477)
+    interval = args.interval or settings.get('refresh_interval_seconds', 3600)
+
+    # Scheduler thread; POST /refresh wakes it early
+    trigger, stop = threading.Event(), threading.Event()
+    trigger.force = False
+    scheduler = threading.Thread(target=run_scheduler, args=(service, interval, trigger, stop), daemon=True)
+    scheduler.start()
+
+    server = ThreadingHTTPServer((host, port), make_handler(service, trigger))
+    logger.info(f"Serving on http://{host}:{port} (refresh every {interval:g}s)")
+    logger.info("Endpoints: GET /health /panel[?format=json] /model_results /quality, POST /refresh[?force=1]")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info("\nShutting down")
+    finally:
+        stop.set()
+        trigger.set()
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+Shared-memory handoff of the macro panel to multiprocessing workers.
+The parent publishes the date index and numeric columns into one shared
+memory block once; workers attach by name and get zero-copy pandas views
+instead of receiving a pickled copy of the DataFrame. Run as a script to
+check that worker frames still share the block after common operations.
+"""
+
+import argparse
+import atexit
+import logging
+import sys
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from compact import read_compact_csv
+from utils import setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class SharedPanelHandle:
+    """Small picklable description of a published panel; pass this to workers."""
+    shm_name: str
+    n_rows: int
+    columns: tuple
+    date_col: str
+
+
+class SharedPanel:
+    """Owner of a panel published to shared memory.
+
+    Layout: n_rows int64 dates (ns) followed by the float64 values stored
+    column-major, so every column is contiguous. Use as a context manager, or
+    call close(); the block is also released at interpreter exit.
+    """
+
+    def __init__(self, df, date_col='date'):
+        columns = [c for c in df.columns
+                   if c != date_col and pd.api.types.is_numeric_dtype(df[c])]
+        n_rows = len(df)
+        size = max(8 * n_rows * (1 + len(columns)), 1)
+
+        self._shm = shared_memory.SharedMemory(create=True, size=size)
+        _, dates, values = _views(self._shm.buf, n_rows, len(columns))
+        dates[:] = pd.to_datetime(df[date_col]).to_numpy(dtype='datetime64[ns]').view(np.int64)
+        values[:] = df[columns].to_numpy(dtype=np.float64)
+
+        self.handle = SharedPanelHandle(self._shm.name, n_rows, tuple(columns), date_col)
+        atexit.register(self.close)
+        logger.info(f"Published panel to shared memory: {n_rows} rows x {len(columns)} columns "
+                    f"({size / 1e6:.1f} MB)")
+
+    @classmethod
+    def from_csv(cls, path, date_col='date'):
+        """Load a pipeline CSV the same way eda.py/modeling.py do, then publish it."""
+        return cls(pd.read_csv(path, parse_dates=[date_col]), date_col=date_col)
+
+    def close(self):
+        """Release and unlink the shared block (safe to call more than once)."""
+        if self._shm is None:
+            return
+        atexit.unregister(self.close)
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class AttachedPanel:
+    """Worker-side, read-only view of a published panel.
+
+    frame is a DataFrame whose columns are views on the shared block. The
+    mapping stays open while any array viewing it is alive (including
+    frames derived from frame) and is closed when the last one goes away.
+    """
+
+    def __init__(self, handle):
+        shm = _attach(handle.shm_name)
+        block, dates, values = _views(shm.buf, handle.n_rows, len(handle.columns))
+        dates.flags.writeable = False
+        values.flags.writeable = False
+        # Every view's .base is block, so this runs once nothing references the data
+        weakref.finalize(block, shm.close)
+
+        index = pd.DatetimeIndex(dates.view('datetime64[ns]'), name=handle.date_col, copy=False)
+        # values.T is C-contiguous (columns x rows), which pandas stores without copying
+        self.frame = pd.DataFrame(values, index=index, columns=list(handle.columns), copy=False)
+
+    def close(self):
+        """Drop this object's reference; frames still viewing the block keep it mapped."""
+        self.frame = None
+
+    def __enter__(self):
+        return self.frame
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _views(buf, n_rows, n_cols):
+    """Byte block plus dates and (rows x columns) value arrays carved from it."""
+    block = np.ndarray((8 * n_rows * (1 + n_cols),), dtype=np.uint8, buffer=buf)
+    dates = block[:8 * n_rows].view(np.int64)
+    values = block[8 * n_rows:].view(np.float64).reshape((n_rows, n_cols), order='F')
+    return block, dates, values
+
+
+def _attach(name):
+    """Open an existing block without letting this process's tracker unlink it."""
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    # Before 3.13 attaching also registers the block with the resource
+    # tracker, which would unlink it when a worker exits; skip that step
+    from multiprocessing import resource_tracker
+    register = resource_tracker.register
+    resource_tracker.register = lambda *args: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+def load_panel(source, date_col='date', compact=False):
+    """Load the panel from a CSV path or a SharedPanelHandle.
+
+    Returns a frame shaped like pd.read_csv(path, parse_dates=[date_col]) so
+    the eda.py/modeling.py stage functions work unchanged. For a handle the
+    numeric columns stay views on shared memory, which remains mapped until
+    the last frame viewing it is dropped.
+    compact=True stores columns as float32 where the precision budget allows.
+    """
+    if isinstance(source, SharedPanelHandle):
+        return AttachedPanel(source).frame.reset_index()
+    if compact:
+        return read_compact_csv(Path(source), date_col)
+    return pd.read_csv(Path(source), parse_dates=[date_col])
+
+
+def _worker_shares_memory(handle):
+    """Which derived frames in a worker still view the shared block."""
+    frame = load_panel(handle)
+    complete = [c for c in handle.columns if frame[c].notna().all()]
+    column = complete[0] if complete else handle.columns[0]
+    base = frame[column].to_numpy()
+    derived = {
+        'load_panel': frame,
+        'select': frame[[handle.date_col] + list(handle.columns)],
+        'dropna': frame[[handle.date_col] + complete].dropna(),
+    }
+    return {name: bool(np.shares_memory(df[column].to_numpy(), base)) and not df.attrs
+            for name, df in derived.items()}
+
+
+def check_zero_copy(df, date_col='date'):
+    """Publish df and check a worker process's derived frames stay zero-copy.
+
+    dropna() is checked on the columns without missing values, since
+    dropping rows necessarily copies. Returns the names of failed checks.
+    """
+    with SharedPanel(df, date_col) as panel:
+        with ProcessPoolExecutor(max_workers=1) as pool:
+            shared = pool.submit(_worker_shares_memory, panel.handle).result()
+    return [name for name, ok in shared.items() if not ok]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check the shared-memory panel handoff stays zero-copy')
+    parser.add_argument('--input', required=True, help='Input CSV path')
+    args = parser.parse_args()
+    setup_logging()
+    
+    failures = check_zero_copy(pd.read_csv(args.input, parse_dates=['date']))
+    for failure in failures:
+        logger.error(f"   COPIED {failure}")
+    logger.info(f"Shared panel zero-copy check: {'FAIL' if failures else 'PASS'}")
+    if failures:
+        exit(1)
+
+
+if __name__ == '__main__':
+    main()
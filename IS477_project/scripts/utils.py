@@ -3,36 +3,262 @@ Utility functions for the data pipeline.
 Shared helper functions used across all scripts.
 """
 
+import contextlib
+import functools
 import hashlib
+import inspect
 import json
+import logging
+import os
+import pickle
+import sys
+import tempfile
 from pathlib import Path
 from datetime import datetime, timezone
 
+try:
+    import fcntl
+except ImportError:  # Windows: manifest writes are not locked
+    fcntl = None
+
+import numpy as np
+import pandas as pd
 import requests
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
 
+logger = logging.getLogger(__name__)
+
+
+# Read/write buffer for checksumming large outputs
+HASH_BUFFER_SIZE = 1024 * 1024
+
+# Aggregated provenance manifest (one per pipeline run)
+PROVENANCE_DIR = os.environ.get('PIPELINE_PROVENANCE_DIR', 'provenance')
+
+# Per-stage completion markers used to resume interrupted runs
+STATE_DIR = os.environ.get('PIPELINE_STATE_DIR', '.pipeline_state')
+
+
+# mkstemp creates files as 0600; finished outputs get the usual umask mode
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
+
+def _temp_path(path):
+    """New hidden temp file next to path, keeping the suffix for format detection.
+
+    Names are unique per call, so threads of one process writing the same
+    artifact never share a temp file.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f".{path.stem}.", suffix=path.suffix)
+    os.close(fd)
+    os.chmod(tmp_path, 0o666 & ~_UMASK)
+    return Path(tmp_path)
+
+
+def _commit(tmp_path, path):
+    """fsync a finished temp file and atomically move it into place."""
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+@contextlib.contextmanager
+def atomic_path(path):
+    """Yield a temp path to write to; it replaces path only if the block succeeds.
+
+    A killed or failed writer never leaves a truncated file at path.
+    """
+    path = Path(path)
+    tmp_path = _temp_path(path)
+    try:
+        yield tmp_path
+        _commit(tmp_path, path)
+    finally:
+        tmp_path.unlink(missing_ok=True)
+
+
+def atomic_write_text(path, text):
+    """Path.write_text that is crash-safe."""
+    with atomic_path(path) as tmp_path:
+        tmp_path.write_text(text)
+    return Path(path)
+
+
 def sha256_checksum(filepath):
     """Calculate SHA-256 checksum of a file."""
-    h = hashlib.sha256()
     with open(filepath, 'rb') as f:
-        for chunk in iter(lambda: f.read(8192), b""):
+        if hasattr(hashlib, 'file_digest'):
+            return hashlib.file_digest(f, 'sha256').hexdigest()
+        h = hashlib.sha256()
+        for chunk in iter(lambda: f.read(HASH_BUFFER_SIZE), b""):
             h.update(chunk)
     return h.hexdigest()
 
 
-def save_metadata(csv_path, info):
-    """Save metadata JSON file next to the CSV."""
+class HashingWriter:
+    """Text file writer that hashes and counts bytes as it writes.
+
+    Lets outputs be checksummed without reading them back from disk. Data goes
+    to a temp file that replaces path only when the context exits cleanly.
+    """
+
+    def __init__(self, path, encoding='utf-8'):
+        self.path = Path(path)
+        self.encoding = encoding
+        self._tmp_path = _temp_path(self.path)
+        self._file = open(self._tmp_path, 'wb', buffering=HASH_BUFFER_SIZE)
+        self._hash = hashlib.sha256()
+        self.bytes_written = 0
+
+    def write(self, text):
+        data = text.encode(self.encoding)
+        self._hash.update(data)
+        self.bytes_written += len(data)
+        self._file.write(data)
+        return len(text)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        if exc_type is None:
+            _commit(self._tmp_path, self.path)
+        else:
+            self._tmp_path.unlink(missing_ok=True)
+
+    @property
+    def digest(self):
+        return {
+            'file_size_bytes': self.bytes_written,
+            'sha256': self._hash.hexdigest(),
+        }
+
+
+def write_csv(df, path, **kwargs):
+    """Write a DataFrame to CSV, returning its checksum, size and row count."""
+    kwargs.setdefault('index', False)
+    with HashingWriter(path) as writer:
+        df.to_csv(writer, **kwargs)
+    digest = writer.digest
+    digest['row_count'] = len(df)
+    return digest
+
+
+def _run_id():
+    """Id of the current run; one provenance manifest is written per id.
+
+    Snakemake sets PIPELINE_RUN_ID so every rule of a run shares one manifest.
+    Otherwise each process starts its own run (exported to child processes);
+    export PIPELINE_RUN_ID yourself to group several manual stage runs.
+    """
+    if not os.environ.get('PIPELINE_RUN_ID'):
+        started = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+        os.environ['PIPELINE_RUN_ID'] = f"{started}-{os.getpid()}"
+    return os.environ['PIPELINE_RUN_ID']
+
+
+def record_provenance(path, info, manifest_dir=None):
+    """Add an output's provenance entry to this run's aggregated manifest."""
+    manifest_dir = Path(manifest_dir or PROVENANCE_DIR)
+    manifest_dir.mkdir(parents=True, exist_ok=True)
+    run_id = _run_id()
+    manifest_path = manifest_dir / f"run_{run_id}.json"
+
+    # Rules may run in parallel, so serialize the read-modify-write
+    with open(manifest_dir / '.lock', 'w') as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        if manifest_path.exists():
+            manifest = json.loads(manifest_path.read_text())
+        else:
+            manifest = {'run_id': run_id, 'created_at_utc': datetime.now(timezone.utc).isoformat(), 'outputs': {}}
+        manifest['outputs'][Path(path).as_posix()] = info
+        manifest['updated_at_utc'] = datetime.now(timezone.utc).isoformat()
+        atomic_write_text(manifest_path, json.dumps(manifest, indent=2))
+    return manifest_path
+
+
+def save_metadata(csv_path, info, digest=None):
+    """Record an output's metadata in the run's provenance manifest.
+
+    Pass the digest returned by write_csv to avoid re-reading the file.
+    """
     csv_path = Path(csv_path)
-    info['file_size_bytes'] = csv_path.stat().st_size
-    info['sha256'] = sha256_checksum(csv_path)
+    if digest is None:
+        digest = {
+            'file_size_bytes': csv_path.stat().st_size,
+            'sha256': sha256_checksum(csv_path),
+        }
+    info.update(digest)
     info['retrieved_at_utc'] = datetime.now(timezone.utc).isoformat()
     
-    json_path = csv_path.with_name(csv_path.stem + '_metadata.json')
-    json_path.write_text(json.dumps(info, indent=2))
-    print(f"Metadata saved: {json_path}")
-    return json_path
+    manifest_path = record_provenance(csv_path, info)
+    logger.info(f"Metadata recorded: {manifest_path}")
+    return manifest_path
+
+
+def _file_hashes(paths):
+    return {Path(p).as_posix(): sha256_checksum(p) if Path(p).exists() else None for p in paths}
+
+
+def _marker_path(stage, state_dir=None):
+    return Path(state_dir or STATE_DIR) / f"{stage}.done.json"
+
+
+def _code_fingerprint():
+    """Hash of the pipeline scripts, so editing a stage's code reruns it."""
+    return _source_fingerprint(Path(__file__).resolve().parent)
+
+
+def stage_is_complete(stage, inputs, outputs, params=None, state_dir=None):
+    """True if the stage already finished with these inputs, params and code
+    and its outputs are intact.
+
+    Set PIPELINE_FORCE=1 to always rerun.
+    """
+    if os.environ.get('PIPELINE_FORCE', '0') == '1':
+        return False
+    marker_path = _marker_path(stage, state_dir)
+    if not marker_path.exists():
+        return False
+    marker = json.loads(marker_path.read_text())
+    if marker.get('params') != json.loads(json.dumps(params, default=str)):
+        return False
+    if marker.get('code') != _code_fingerprint():
+        return False
+    if marker.get('inputs') != _file_hashes(inputs):
+        return False
+    recorded = marker.get('outputs', {})
+    return all(
+        Path(p).exists() and recorded.get(Path(p).as_posix()) == sha256_checksum(p)
+        for p in outputs
+    )
+
+
+def mark_stage_complete(stage, inputs, outputs, params=None, state_dir=None):
+    """Record that a stage finished, with hashes of what it read and wrote."""
+    marker_path = _marker_path(stage, state_dir)
+    marker_path.parent.mkdir(parents=True, exist_ok=True)
+    marker = {
+        'stage': stage,
+        'completed_at_utc': datetime.now(timezone.utc).isoformat(),
+        'params': params,
+        'code': _code_fingerprint(),
+        'inputs': _file_hashes(inputs),
+        'outputs': _file_hashes(outputs),
+    }
+    atomic_write_text(marker_path, json.dumps(marker, indent=2, default=str))
+    return marker_path
 
 
 def create_session():
@@ -58,4 +284,189 @@ def ensure_directories(config):
     """Create necessary directories if they don't exist."""
     for dir_name, dir_path in config['directories'].items():
         Path(dir_path).mkdir(parents=True, exist_ok=True)
-        print(f"Directory ready: {dir_path}")
+        logger.info(f"Directory ready: {dir_path}")
+
+
+# Log record attributes that are not user-supplied extra fields
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {'message', 'asctime'}
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; fields passed via extra= become keys."""
+
+    def format(self, record):
+        entry = {
+            'time': datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        entry.update({k: v for k, v in vars(record).items() if k not in _RECORD_ATTRIBUTES})
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+def setup_logging(level=None, fmt=None):
+    """Configure pipeline logging for a command-line run.
+
+    Library callers configure logging themselves. fmt is 'text' (plain
+    messages) or 'json' (one object per line); defaults come from
+    PIPELINE_LOG_FORMAT and PIPELINE_LOG_LEVEL.
+    """
+    fmt = fmt or os.environ.get('PIPELINE_LOG_FORMAT', 'text')
+    level = level or os.environ.get('PIPELINE_LOG_LEVEL', 'INFO')
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter() if fmt == 'json' else logging.Formatter('%(message)s'))
+    logging.basicConfig(level=level, handlers=[handler], force=True)
+
+
+# Stage-result cache settings (override with environment variables)
+CACHE_DIR = os.environ.get('PIPELINE_CACHE_DIR', '.cache/stages')
+CACHE_MAX_BYTES = int(os.environ.get('PIPELINE_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+
+
+def _hash_array(h, values):
+    """Feed a column's raw array into a hash, falling back for object data."""
+    values = np.asarray(values)
+    if values.dtype.kind in 'biufcmM':
+        h.update(str(values.dtype).encode())
+        h.update(np.ascontiguousarray(values).view(np.uint8).tobytes())
+    else:
+        hashed = pd.util.hash_pandas_object(pd.Series(values), index=False)
+        h.update(hashed.to_numpy().tobytes())
+
+
+def hash_frame(df):
+    """Fast content hash of a DataFrame from its column arrays and index."""
+    h = hashlib.blake2b(digest_size=16)
+    h.update(repr(df.shape).encode())
+    for col in df.columns:
+        h.update(repr(col).encode())
+        _hash_array(h, df[col].to_numpy())
+    _hash_array(h, df.index.to_numpy())
+    return h.hexdigest()
+
+
+def _hash_argument(h, value):
+    if isinstance(value, pd.DataFrame):
+        h.update(b'frame:' + hash_frame(value).encode())
+    elif isinstance(value, pd.Series):
+        h.update(b'series:' + hash_frame(value.to_frame()).encode())
+    elif isinstance(value, np.ndarray):
+        h.update(repr(value.shape).encode())
+        _hash_array(h, value)
+    else:
+        h.update(repr(value).encode())
+
+
+def _hash_code(h, code):
+    h.update(code.co_code)
+    for const in code.co_consts:
+        # Nested code objects (comprehensions, lambdas) repr with memory addresses
+        if inspect.iscode(const):
+            _hash_code(h, const)
+        else:
+            h.update(repr(const).encode())
+
+
+@functools.lru_cache(maxsize=None)
+def _source_fingerprint(directory):
+    """Hash of every .py file in directory (the pipeline's own modules)."""
+    h = hashlib.sha256()
+    for path in sorted(Path(directory).glob('*.py')):
+        h.update(path.name.encode())
+        h.update(path.read_bytes())
+    return h.hexdigest()
+
+
+def _function_fingerprint(func, version=None):
+    """Identify a function by name, compiled body and pipeline source.
+
+    Helpers it calls (e.g. moments.summarize_panel) live in sibling modules,
+    so any edit to the scripts invalidates the cache. Bump version for
+    changes outside them, such as a library upgrade.
+    """
+    h = hashlib.sha256()
+    _hash_code(h, func.__code__)
+    module = inspect.getmodule(func)
+    name = func.__module__
+    if module is not None and getattr(module, '__file__', None):
+        path = Path(module.__file__).resolve()
+        h.update(_source_fingerprint(str(path.parent)).encode())
+        # Key on the file, not __module__, which is '__main__' when run as a script
+        name = path.stem
+    h.update(repr(version).encode())
+    return f"{name}.{func.__qualname__}:{h.hexdigest()[:16]}"
+
+
+def _evict_cache(cache_dir, max_bytes):
+    """Remove least recently used entries until the cache fits in max_bytes."""
+    # Other processes sharing the cache may delete entries while we look
+    entries = []
+    for path in cache_dir.glob('*.pkl'):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        entries.append((stat.st_mtime, stat.st_size, path))
+    entries.sort(key=lambda entry: entry[0])
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in entries:
+        if total <= max_bytes:
+            break
+        total -= size
+        path.unlink(missing_ok=True)
+
+
+def memoize_stage(func=None, *, cache_dir=None, max_bytes=None, version=None):
+    """Cache a pure stage function's result on disk, keyed by its inputs.
+
+    DataFrame arguments are hashed from their column arrays; other arguments
+    by repr. The key also covers the source of the scripts directory and an
+    optional version. Results are pickled and evicted least-recently-used once
+    the cache exceeds max_bytes. Set PIPELINE_CACHE=0 to bypass the cache, or
+    call func.__wrapped__ to skip it for one call.
+    """
+    if func is None:
+        return functools.partial(memoize_stage, cache_dir=cache_dir, max_bytes=max_bytes,
+                                 version=version)
+
+    signature = inspect.signature(func)
+    fingerprint = _function_fingerprint(func, version)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if os.environ.get('PIPELINE_CACHE', '1') == '0':
+            return func(*args, **kwargs)
+
+        bound = signature.bind(*args, **kwargs)
+        bound.apply_defaults()
+        h = hashlib.blake2b(digest_size=20)
+        h.update(fingerprint.encode())
+        for name, value in bound.arguments.items():
+            h.update(name.encode())
+            _hash_argument(h, value)
+
+        directory = Path(cache_dir or CACHE_DIR)
+        entry = directory / f"{func.__name__}-{h.hexdigest()}.pkl"
+        if entry.exists():
+            try:
+                with open(entry, 'rb') as f:
+                    result = pickle.load(f)
+                os.utime(entry)  # mark as recently used
+                logger.info(f"Cache hit: {func.__name__}", extra={'stage_function': func.__name__})
+                return result
+            except (OSError, EOFError, pickle.UnpicklingError):
+                entry.unlink(missing_ok=True)
+
+        result = func(*args, **kwargs)
+
+        directory.mkdir(parents=True, exist_ok=True)
+        with atomic_path(entry) as tmp_path:
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        _evict_cache(directory, max_bytes if max_bytes is not None else CACHE_MAX_BYTES)
+        return result
+
+    return wrapper
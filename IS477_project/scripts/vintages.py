@@ -0,0 +1,162 @@
+"""
+Vintage-aware storage for revised FRED series (ALFRED-style realtime periods).
+Each acquisition is stored as a delta against the previous vintage so that
+any historical "as of" view can be reconstructed without re-fetching.
+"""
+
+import argparse
+import json
+import logging
+from pathlib import Path
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+
+from utils import atomic_write_text, write_csv, setup_logging
+
+
+logger = logging.getLogger(__name__)
+
+
+# FRED uses this sentinel for "still current" realtime periods
+REALTIME_END_OPEN = pd.Timestamp('9999-12-31')
+
+
+def _series_dir(store_dir, series_id):
+    return Path(store_dir) / series_id
+
+
+def _load_index(series_dir):
+    index_path = series_dir / 'index.json'
+    if index_path.exists():
+        return json.loads(index_path.read_text())
+    return {'vintages': []}
+
+
+def _read_deltas(series_dir, value_col, vintages):
+    """Read delta files for the given vintage entries into one long frame."""
+    frames = [
+        pd.read_csv(series_dir / v['file'], parse_dates=['date', 'realtime_start'])
+        for v in vintages
+    ]
+    if not frames:
+        return pd.DataFrame(columns=['date', value_col, 'realtime_start'])
+    return pd.concat(frames, ignore_index=True)
+
+
+def load_vintage_history(store_dir, series_id, value_col):
+    """Load all stored observations with realtime_start/realtime_end periods."""
+    series_dir = _series_dir(store_dir, series_id)
+    index = _load_index(series_dir)
+    history = _read_deltas(series_dir, value_col, index['vintages'])
+    history = history.sort_values(['date', 'realtime_start'], kind='mergesort')
+    history = history.reset_index(drop=True)
+
+    # A row stays valid until the day before the next revision of the same date
+    next_start = history.groupby('date')['realtime_start'].shift(-1)
+    history['realtime_end'] = (next_start - pd.Timedelta(days=1)).fillna(REALTIME_END_OPEN)
+    return history
+
+
+def reconstruct_as_of(store_dir, series_id, value_col, as_of):
+    """Rebuild the series as it was published on a given realtime date."""
+    as_of = pd.Timestamp(as_of)
+    series_dir = _series_dir(store_dir, series_id)
+    index = _load_index(series_dir)
+
+    # Deltas are named by vintage date, so later vintages are never read
+    vintages = [v for v in index['vintages'] if pd.Timestamp(v['vintage_date']) <= as_of]
+    if not vintages:
+        raise ValueError(f"No vintage of {series_id} available as of {as_of.date()}")
+
+    deltas = _read_deltas(series_dir, value_col, vintages)
+    latest = deltas.sort_values('realtime_start', kind='mergesort').drop_duplicates('date', keep='last')
+
+    # NaN values are tombstones for observations dropped in a later vintage
+    latest = latest.dropna(subset=[value_col])
+    latest = latest.sort_values('date').reset_index(drop=True)
+    return latest[['date', value_col]]
+
+
+def record_vintage(df, store_dir, series_id, value_col, vintage_date=None):
+    """Store a newly acquired series as a delta against the latest vintage.
+
+    Only observations that are new, revised or removed since the previous
+    vintage are written. Returns the delta row count.
+    """
+    vintage_date = pd.Timestamp(vintage_date or datetime.now(timezone.utc).date())
+    series_dir = _series_dir(store_dir, series_id)
+    series_dir.mkdir(parents=True, exist_ok=True)
+    index = _load_index(series_dir)
+
+    stale = None
+    if index['vintages'] and index['vintages'][-1]['vintage_date'] == str(vintage_date.date()):
+        # Re-acquiring on the same day replaces that day's delta. Its file is
+        # overwritten in place, or removed only after index.json stops listing
+        # it, so a crash never leaves the index pointing at a missing file.
+        stale = index['vintages'].pop()
+
+    if index['vintages']:
+        last_date = pd.Timestamp(index['vintages'][-1]['vintage_date'])
+        if vintage_date < last_date:
+            raise ValueError(
+                f"Vintage {vintage_date.date()} is older than latest stored vintage {last_date.date()}"
+            )
+        previous = reconstruct_as_of(store_dir, series_id, value_col, last_date)
+    else:
+        previous = pd.DataFrame({'date': pd.Series(dtype='datetime64[ns]'), value_col: []})
+
+    current = df[['date', value_col]].copy()
+    current['date'] = pd.to_datetime(current['date'])
+
+    merged = pd.merge(previous, current, on='date', how='outer', suffixes=('_prev', ''))
+    prev_values = merged[f'{value_col}_prev'].to_numpy(dtype=float)
+    new_values = merged[value_col].to_numpy(dtype=float)
+
+    # New or revised values, plus tombstones (NaN) for dates no longer published
+    unchanged = (prev_values == new_values) | (np.isnan(prev_values) & np.isnan(new_values))
+    delta = merged.loc[~unchanged, ['date', value_col]].copy()
+    delta['realtime_start'] = vintage_date
+
+    if delta.empty:
+        atomic_write_text(series_dir / 'index.json', json.dumps(index, indent=2))
+        if stale:
+            (series_dir / stale['file']).unlink(missing_ok=True)
+        logger.info(f"Vintage {vintage_date.date()} of {series_id}: no revisions")
+        return 0
+
+    file_name = f"{vintage_date.date()}.csv"
+    write_csv(delta, series_dir / file_name, date_format='%Y-%m-%d')
+    index['vintages'].append({
+        'vintage_date': str(vintage_date.date()),
+        'file': file_name,
+        'delta_rows': int(len(delta)),
+        'total_rows': int(len(current)),
+    })
+    atomic_write_text(series_dir / 'index.json', json.dumps(index, indent=2))
+    logger.info(f"Vintage {vintage_date.date()} of {series_id}: {len(delta)} new/revised observations")
+    return len(delta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Reconstruct a stored FRED vintage')
+    parser.add_argument('--store-dir', default='data/vintages', help='Vintage store directory')
+    parser.add_argument('--series-id', required=True, help='FRED series ID (e.g. PCE)')
+    parser.add_argument('--value-col', required=True, help='Value column name (e.g. pce)')
+    parser.add_argument('--as-of', required=True, help='Realtime date to reconstruct (YYYY-MM-DD)')
+    parser.add_argument('--output', required=True, help='Output CSV path')
+    args = parser.parse_args()
+    setup_logging()
+
+    df = reconstruct_as_of(args.store_dir, args.series_id, args.value_col, args.as_of)
+
+    # Same layout as the acquire scripts, so integrate.py can consume it directly
+    output_path = Path(args.output)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    write_csv(df, output_path, date_format='%Y-%m-%d')
+    logger.info(f"{args.series_id} as of {args.as_of} saved: {output_path} ({len(df)} rows)")
+
+
+if __name__ == '__main__':
+    main()